@@ -18,6 +18,8 @@ CREATE TYPE weighted_tagname AS (
 );
 
 
+-- Only used by databases from before the reviewers table.
+-- To upgrade those, run 09_migrate_reviewers first and apply this file afterwards.
 CREATE TYPE review_author AS (
     steamid BIGINT,
     num_games_owned INT,
@@ -42,16 +44,48 @@ CREATE TABLE IF NOT EXISTS apps (
 );
 
 
+-- History of apps: one row per app and load in which its store data changed (see 01_write_apps).
+-- content_hash of the latest row per app decides whether a load writes the app at all.
+CREATE TABLE IF NOT EXISTS app_snapshots (
+    appid INT,
+    snapshot_time TIMESTAMP,
+    content_hash BYTEA,
+    name TEXT,
+    reviews review_summary,
+    release_date TIMESTAMP,
+    tagids weighted_tagid[],
+    publishers TEXT[],
+    developers TEXT[],
+    price numeric,
+    PRIMARY KEY (appid, snapshot_time)
+);
+
+
 CREATE TABLE IF NOT EXISTS tags (
     tagid INT PRIMARY KEY,
     tagname TEXT
 );
 
 
+-- One row per review author, with the author stats of their newest review (stats_updated = its timestamp_created).
+-- 03_write_reviews only inserts unknown steamids, so the reviewerid sequence stays dense.
+CREATE TABLE IF NOT EXISTS reviewers (
+    reviewerid SERIAL PRIMARY KEY,
+    steamid BIGINT UNIQUE NOT NULL,
+    num_games_owned INT,
+    num_reviews INT,
+    stats_updated TIMESTAMP
+);
+
+
 CREATE TABLE IF NOT EXISTS reviews (
     recommendationid INT PRIMARY KEY,
-	appid INT,
-    author review_author,
+    appid INT,
+    reviewerid INT,  -- reviewers.reviewerid
+    playtime_forever INT,
+    playtime_last_two_weeks INT,
+    playtime_at_review INT,
+    last_played TIMESTAMP,
     review TEXT,
     timestamp_created TIMESTAMP,
     timestamp_updated TIMESTAMP,
@@ -68,8 +102,80 @@ CREATE TABLE IF NOT EXISTS reviews (
 CREATE INDEX IF NOT EXISTS idx_reviews_appid
 ON reviews (appid);
 
-CREATE INDEX IF NOT EXISTS idx_reviews_authorid
-ON reviews ( ((author).steamid) );
+CREATE INDEX IF NOT EXISTS idx_reviews_reviewerid
+ON reviews (reviewerid, appid);
+
+-- Full-text search over review text.
+-- Filled by trigger for new rows; existing rows are backfilled in batches by 05_write_review_search_index.
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS review_tsv tsvector;
+
+CREATE OR REPLACE FUNCTION reviews_tsv_update()
+RETURNS trigger AS $$
+BEGIN
+    NEW.review_tsv := to_tsvector('english', coalesce(NEW.review, ''));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_reviews_tsv
+BEFORE INSERT OR UPDATE OF review ON reviews
+FOR EACH ROW EXECUTE FUNCTION reviews_tsv_update();
+
+-- The GIN index idx_reviews_review_tsv is built by 05_write_review_search_index after the backfill,
+-- so the backfill doesn't have to maintain it (CONCURRENTLY also can't run inside a transaction).
+
+CREATE INDEX IF NOT EXISTS idx_reviews_timestamp_created
+ON reviews (timestamp_created);
+
+
+-- Review time-series rollups, maintained by 03_write_reviews (see db_utility.write_review_rollups).
+CREATE TABLE IF NOT EXISTS review_daily_rollup (
+    appid INT,
+    day DATE,
+    reviews INT,
+    positive INT,
+    early_access INT,
+    steam_deck INT,
+    playtime_at_review BIGINT,
+    playtime_forever BIGINT,
+    PRIMARY KEY (appid, day)
+);
+
+
+CREATE TABLE IF NOT EXISTS review_monthly_rollup (
+    appid INT,
+    month DATE,
+    reviews INT,
+    positive INT,
+    early_access INT,
+    steam_deck INT,
+    playtime_at_review BIGINT,
+    playtime_forever BIGINT,
+    PRIMARY KEY (appid, month)
+);
+
+
+-- Per-tag t-digest quantile sketches of app metrics, rebuilt by 08_write_tag_sketches.
+-- tagid 0 covers all apps. revenue_estimate only includes apps with price > 0.
+CREATE TABLE IF NOT EXISTS tag_sketches (
+    tagid INT,
+    metric TEXT,
+    compression INT,
+    count BIGINT,
+    min DOUBLE PRECISION,
+    max DOUBLE PRECISION,
+    means DOUBLE PRECISION[],
+    weights DOUBLE PRECISION[],
+    PRIMARY KEY (tagid, metric)
+);
+
+
+-- Bumped by the writers whenever a table's contents change; used to invalidate local snapshots.
+CREATE TABLE IF NOT EXISTS data_versions (
+    name TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP
+);
 
 
 CREATE TABLE IF NOT EXISTS app_shared_reviewers (
@@ -96,6 +202,14 @@ SELECT
     ) AS tagnames
 FROM apps a;
 
+-- Materialized copy of apps_view for analytical reads.
+-- Refreshed (concurrently) by db_utility.refresh_apps_view after apps or tags are written.
+CREATE MATERIALIZED VIEW IF NOT EXISTS apps_materialized_view AS
+SELECT * FROM apps_view;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_apps_materialized_view_appid
+ON apps_materialized_view (appid);
+
 CREATE OR REPLACE VIEW app_shared_reviewers_view AS
 SELECT
   a.*,
@@ -114,7 +228,7 @@ SELECT
 FROM app_shared_reviewers a;
 
 
-DROP VIEW games_map_nodes_gephi_view;
+DROP VIEW IF EXISTS games_map_nodes_gephi_view;
 CREATE OR REPLACE VIEW games_map_nodes_gephi_view AS
 SELECT
   appid AS "id",
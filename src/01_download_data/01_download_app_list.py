@@ -1,18 +1,19 @@
 import os
 
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 
-from src import paths
+from src import paths, pipeline_metrics, request_controller
 
 #Settings
 OUTPUT_PATH = paths.APP_LIST_PATH
+CONTROLLER = request_controller.get_controller("GetAppList", initial_limit=1, max_limit=1, max_attempts=5, max_timeout=60)
 
 
 def main():
     load_dotenv()
-    download_app_list()
+    with pipeline_metrics.stage("01_download_app_list"):
+        download_app_list()
 
 
 def download_app_list():
@@ -35,8 +36,7 @@ def download_app_list():
         request_count += 1
         print(f"request: {request_count}...")
         
-        response = requests.get(url, params=params)
-        response.raise_for_status()
+        response = CONTROLLER.get(url, params=params)
 
         data = response.json()
 
@@ -54,6 +54,7 @@ def download_app_list():
 
     os.makedirs("data", exist_ok=True)
     df.to_csv(OUTPUT_PATH, index=False)
+    pipeline_metrics.record_file_written(OUTPUT_PATH)
 
 
 if __name__ == "__main__":
@@ -2,16 +2,17 @@ import json
 import os
 
 import pandas as pd
-import requests
 
-from src import paths
+from src import paths, pipeline_metrics, request_controller
 
 #Settings
 OUTPUT_PATH = paths.TAG_LIST_PATH
+CONTROLLER = request_controller.get_controller("GetTagList", initial_limit=1, max_limit=1, max_attempts=5, max_timeout=60)
 
 
 def main():
-    download_tag_list()
+    with pipeline_metrics.stage("02_download_tag_list"):
+        download_tag_list()
 
 
 def download_tag_list():
@@ -20,12 +21,12 @@ def download_tag_list():
         "language": "english"
     }
 
-    response = requests.get(url, params=params)
-    response.raise_for_status()
+    response = CONTROLLER.get(url, params=params)
 
     os.makedirs("data", exist_ok=True)
     with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
         json.dump(response.json(), f, indent=2)
+    pipeline_metrics.record_file_written(OUTPUT_PATH)
 
 
 if __name__ == "__main__":
@@ -4,12 +4,13 @@ import os
 import pandas as pd
 import requests
 
-from src import paths
+from src import paths, pipeline_metrics, request_controller
 
 # Settings
 OUTPUT_DIR = paths.STOREBROWSE_ITEMS_DIRECTORY
 BATCH_SIZE = 100
 URL = "https://api.steampowered.com/IStoreBrowseService/GetItems/v1"
+CONTROLLER = request_controller.get_controller("GetItems", max_attempts=3, max_timeout=10)
 params = {
     "ids": [],
     "context": {
@@ -45,29 +46,29 @@ def main():
 
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    for i in range(0, len(all_apps), BATCH_SIZE):
-        appids = [int(appid) for appid in all_apps["appid"][i:i+BATCH_SIZE]]
-        print(f"({i / len(all_apps) * 100:.2f} %) Fetched batch {appids[0]}...{appids[-1]}.")
-        fetch_and_save(appids)
+    with pipeline_metrics.stage("03_download_storebrowse_items"):
+        for i in range(0, len(all_apps), BATCH_SIZE):
+            appids = [int(appid) for appid in all_apps["appid"][i:i+BATCH_SIZE]]
+            print(f"({i / len(all_apps) * 100:.2f} %) Fetched batch {appids[0]}...{appids[-1]}.")
+            fetch_and_save(appids)
 
 
 def fetch_and_save(appids):
     params["ids"].clear()
     params["ids"].extend([{"appid": a} for a in appids])
-    for attempt in range(3):
-        try:
-            response = requests.get(URL, params={"input_json": json.dumps(params)}, timeout=4)
-            response.raise_for_status()
-            break
-        except requests.exceptions.RequestException as e:
-            print(f"Received unexpected status code ({appids[0]}...{appids[-1]}): {e}.")
-    else:
+    try:
+        response = CONTROLLER.get(URL, params={"input_json": json.dumps(params)})
+    except requests.exceptions.RequestException as e:
+        print(f"Received unexpected status code ({appids[0]}...{appids[-1]}): {e}.")
+        pipeline_metrics.count("batches_failed_total")
         return
 
     data = pd.DataFrame(response.json())
     #data.to_json(f"{OUTPUT_DIR}/{appids[0]}-{appids[-1]}.json", orient="records", indent=2)
-    with open(f"{OUTPUT_DIR}/{appids[0]}-{appids[-1]}.json", "w") as f:
+    filepath = f"{OUTPUT_DIR}/{appids[0]}-{appids[-1]}.json"
+    with open(filepath, "w") as f:
         json.dump(response.json(), f, indent=2)
+    pipeline_metrics.record_file_written(filepath)
 
 
 if __name__ == "__main__":
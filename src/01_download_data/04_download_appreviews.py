@@ -9,12 +9,12 @@ import pandas as pd
 import requests
 from tqdm import tqdm
 
-from src import db_utility, paths
+from src import db_utility, paths, pipeline_metrics, request_controller
 
 
 # Settings
 OUTPUT_DIR = paths.REVIEWS_DIRECTORY
-MAX_REQUESTS = 15
+MAX_REQUESTS = 32  # upper bound, the controller finds the actual concurrency
 APPIDS = None
 URL = "https://store.steampowered.com/appreviews/"
 PARAMS = {
@@ -24,7 +24,14 @@ PARAMS = {
         "cursor": "*",
         "num_per_page": 100,
     }
-MAX_REQUEST_ATTEMPTS = 100
+MAX_REQUEST_ATTEMPTS = 20
+MAX_TIMEOUT = 20
+CONTROLLER = request_controller.get_controller(
+    "appreviews",
+    initial_limit=8,
+    max_limit=MAX_REQUESTS,
+    max_attempts=MAX_REQUEST_ATTEMPTS,
+    max_timeout=MAX_TIMEOUT)
 
 
 # globals
@@ -34,6 +41,11 @@ failed_appids = []
 
 
 def main():
+    with pipeline_metrics.stage("04_download_appreviews"):
+        download_appreviews()
+
+
+def download_appreviews():
     print(f"Fetching appreviews from: {URL}")
 
     if not APPIDS:
@@ -105,33 +117,37 @@ def fetch_and_save(appid):
     app_params = PARAMS.copy()
     all_reviews = []
     total_reviews = None
-    failed_requests = 0
     
     while True:
         if stop_event.is_set():
             return
 
         try:
-            response = requests.get(app_url, params=app_params, timeout=20)
-            response.raise_for_status()
-            failed_requests = 0
+            # retries with backoff and the concurrency limit are handled by the controller
+            response = CONTROLLER.get(app_url, stop_event=stop_event, params=app_params)
+        except InterruptedError:
+            return
         except requests.exceptions.RequestException as e:
-            failed_requests += 1
-            tqdm.write(f"  [App {appid}] Received unexpected status code (failed_requests = {failed_requests}): {e}.")
-            if (failed_requests > MAX_REQUEST_ATTEMPTS):
-                failed_appids.append(appid)
-
-                with open(os.path.join(OUTPUT_DIR, f"{appid}-failed.json"), "w", encoding="utf-8") as f:
-                    json.dump(all_reviews, f, indent=2)
-                    f.write(f"\n\n{app_params["cursor"]}")
-
-                tqdm.write(f"[App {appid}] Giving up after {MAX_REQUEST_ATTEMPTS} failed requests............................")
-                return
-            continue
+            failed_appids.append(appid)
+            pipeline_metrics.count("apps_failed_total")
+
+            with open(os.path.join(OUTPUT_DIR, f"{appid}-failed.json"), "w", encoding="utf-8") as f:
+                json.dump(all_reviews, f, indent=2)
+                f.write(f"\n\n{app_params["cursor"]}")
+
+            # the controller only retries 429, 5xx and connection errors, other 4xx fail the app right away
+            status = e.response.status_code if isinstance(e, requests.exceptions.HTTPError) and e.response is not None else None
+            if status is not None and status != 429 and status < 500:
+                reason = f"on HTTP {status}, client errors are not retried"
+            else:
+                reason = f"after {MAX_REQUEST_ATTEMPTS} failed requests"
+            tqdm.write(f"[App {appid}] Giving up {reason} ({e})............................")
+            return
 
         data = response.json()
         reviews = data.get("reviews", [])   
         all_reviews.extend(reviews)
+        pipeline_metrics.count("reviews_downloaded_total", len(reviews))
 
         if not total_reviews:
             total_reviews = data['query_summary']['total_reviews']
@@ -143,8 +159,10 @@ def fetch_and_save(appid):
         global progress_bar
         progress_bar.update(len(reviews))
 
-    with open(os.path.join(OUTPUT_DIR, f"{appid}.json"), "w", encoding="utf-8") as f:
+    output_file = os.path.join(OUTPUT_DIR, f"{appid}.json")
+    with open(output_file, "w", encoding="utf-8") as f:
         json.dump(all_reviews, f, indent=2)
+    pipeline_metrics.record_file_written(output_file)
     tqdm.write(f"  [App {appid}] Saved {len(all_reviews)} reviews.")
 
 
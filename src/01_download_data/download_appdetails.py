@@ -3,12 +3,13 @@ import os
 import pandas as pd
 import requests
 
-from src import paths
+from src import paths, pipeline_metrics, request_controller
 
 # Settings
 OUTPUT_DIR = paths.APPDETAILS_DIRECTORY
 URL = "https://store.steampowered.com/api/appdetails/APPID"
 params = {}
+CONTROLLER = request_controller.get_controller("appdetails", max_timeout=10)
 
 
 def main():
@@ -19,21 +20,22 @@ def main():
 
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    for appid in all_apps["appid"]:
-        fetch_and_save(appid)
+    with pipeline_metrics.stage("download_appdetails"):
+        for appid in all_apps["appid"]:
+            fetch_and_save(appid)
 
 
 def fetch_and_save(appid):
     params["appids"] = appid
     try:
-        response = requests.get(URL, params=params, timeout=4)
-        response.raise_for_status()
+        response = CONTROLLER.get(URL, params=params)
     except requests.exceptions.RequestException as e:
         print(f"Received unexpected status code for app {appid}: {e}.")
         return
 
     data = pd.DataFrame(response.json())
     data.to_json(f"{OUTPUT_DIR}/{appid}.json", orient="records", indent=2)
+    pipeline_metrics.record_file_written(f"{OUTPUT_DIR}/{appid}.json")
     print(f"Fetched app {appid}.")
 
 
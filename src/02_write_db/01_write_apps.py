@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 from datetime import datetime
@@ -5,30 +6,70 @@ from decimal import Decimal
 
 from tqdm import tqdm
 
-from src import db_utility, paths
+from src import db_utility, paths, pipeline_metrics
 
 
 def main():
-    with db_utility.connect_to_db() as conn:
-        write_apps(conn)
-    print("All apps written successfully!")
+    with pipeline_metrics.stage("01_write_apps"), db_utility.connect_to_db() as conn:
+        changed = write_apps(conn)
+        if changed:
+            db_utility.bump_data_version(conn, "apps")
+            with pipeline_metrics.timed("refresh_seconds", view="apps_materialized_view"):
+                db_utility.refresh_apps_view(conn)
+    print(f"All apps written successfully! ({changed} changed)")
 
 
 def write_apps(conn):
+    """
+    Write the storebrowse items to apps and app_snapshots, returns the number of changed apps.
+
+    Apps whose content hash matches their latest snapshot are skipped entirely.
+    """
     json_files = [f for f in os.listdir(paths.STOREBROWSE_ITEMS_DIRECTORY) if f.endswith(".json")]
     print(len(json_files))
-    
+    content_hashes = get_content_hashes(conn)
+    snapshot_time = datetime.now()
+    changed = 0
+
     for filename in tqdm(json_files, desc="Processing Apps"):
         filepath = os.path.join(paths.STOREBROWSE_ITEMS_DIRECTORY, filename)
         with open(filepath, "r", encoding="utf-8") as f:
             data = json.load(f)
 
-        with conn:
+        with pipeline_metrics.timed("file_write_seconds"), conn:
             for item in data["response"]["store_items"]:
-                write_app(conn, item)
+                app = parse_app(item)
+                content_hash = get_content_hash(app)
+                if content_hashes.get(app["appid"]) == content_hash:
+                    pipeline_metrics.count("rows_unchanged_total", table="apps")
+                    continue
+                write_app(conn, app, content_hash, snapshot_time)
+                content_hashes[app["appid"]] = content_hash
+                changed += 1
+                pipeline_metrics.count("rows_written_total", table="apps")
+        pipeline_metrics.count("files_read_total")
+        pipeline_metrics.count("bytes_read_total", os.path.getsize(filepath))
+    return changed
+
+
+def get_content_hashes(conn):
+    """{appid: content_hash} of the latest snapshot of every app."""
+    SQL = """
+SELECT DISTINCT ON (appid) appid, content_hash
+FROM app_snapshots
+ORDER BY appid, snapshot_time DESC;
+"""
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(SQL)
+            return {appid: bytes(content_hash) for appid, content_hash in cur.fetchall()}
+
+
+def get_content_hash(app):
+    return hashlib.sha256(json.dumps(app, sort_keys=True, default=str).encode()).digest()
 
 
-def write_app(conn, item):
+def parse_app(item):
     appid = item["appid"]
     name = item["name"]
     # Reviews (taking summary_filtered)
@@ -55,18 +96,33 @@ def write_app(conn, item):
     if price is not None:
         price = Decimal(price) / Decimal(100)
 
+    return {
+        "appid": appid,
+        "name": name,
+        "total_reviews": total_reviews,
+        "percent_positive": percent_positive,
+        "review_score": review_score,
+        "release_date": release_date,
+        "tagids": tag_array_str,
+        "publishers": publishers_array_str,
+        "developers": developers_array_str,
+        "price": price,
+    }
+
+
+def write_app(conn, app, content_hash, snapshot_time):
     # Insert into PostgreSQL
     SQL = """
 INSERT INTO apps (appid, name, reviews, release_date, tagids, publishers, developers, price)
 VALUES (
-    %s,
-    %s,
-    ROW(%s,%s,%s)::review_summary,
-    %s,
-    %s::weighted_tagid[],
-    %s::text[],
-    %s::text[],
-    %s
+    %(appid)s,
+    %(name)s,
+    ROW(%(total_reviews)s,%(percent_positive)s,%(review_score)s)::review_summary,
+    %(release_date)s,
+    %(tagids)s::weighted_tagid[],
+    %(publishers)s::text[],
+    %(developers)s::text[],
+    %(price)s
 )
 ON CONFLICT (appid) DO UPDATE
 SET
@@ -77,20 +133,24 @@ SET
     publishers = EXCLUDED.publishers,
     developers = EXCLUDED.developers,
     price = EXCLUDED.price;
+
+INSERT INTO app_snapshots (appid, snapshot_time, content_hash, name, reviews, release_date, tagids, publishers, developers, price)
+SELECT appid, %(snapshot_time)s, %(content_hash)s, name, reviews, release_date, tagids, publishers, developers, price
+FROM apps
+WHERE appid = %(appid)s
+ON CONFLICT (appid, snapshot_time) DO UPDATE
+SET
+    content_hash = EXCLUDED.content_hash,
+    name = EXCLUDED.name,
+    reviews = EXCLUDED.reviews,
+    release_date = EXCLUDED.release_date,
+    tagids = EXCLUDED.tagids,
+    publishers = EXCLUDED.publishers,
+    developers = EXCLUDED.developers,
+    price = EXCLUDED.price;
 """
     with conn.cursor() as cur:
-        cur.execute(SQL, (
-            appid,
-            name,
-            total_reviews,
-            percent_positive,
-            review_score,
-            release_date,
-            tag_array_str,
-            publishers_array_str,
-            developers_array_str,
-            price
-        ))
+        cur.execute(SQL, {**app, "content_hash": content_hash, "snapshot_time": snapshot_time})
 
 
 def assemble_list(items, composite=False):
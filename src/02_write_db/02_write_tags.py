@@ -1,12 +1,15 @@
 import json
 
-from src import db_utility, paths
+from src import db_utility, paths, pipeline_metrics
 
 
 def main():
     #load_dotenv()
-    with db_utility.connect_to_db() as conn:
+    with pipeline_metrics.stage("02_write_tags"), db_utility.connect_to_db() as conn:
         write_tags(conn)
+        db_utility.bump_data_version(conn, "tags")
+        with pipeline_metrics.timed("refresh_seconds", view="apps_materialized_view"):
+            db_utility.refresh_apps_view(conn)
     print("All JSON files imported successfully!")
 
 
@@ -20,11 +23,12 @@ def write_tags(conn):
             tagid = int(tag["tagid"])
             tagname = tag["name"]
             write_tag(conn, tagid, tagname)
+    pipeline_metrics.count("rows_written_total", len(tags), table="tags")
 
 
 def write_tag(conn, tagid, tagname):
     SQL = """
-INSERT INTO tags2 (tagid, tagname)
+INSERT INTO tags (tagid, tagname)
 VALUES (%s, %s)
 ON CONFLICT (tagid) DO UPDATE
 SET
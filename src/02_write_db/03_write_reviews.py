@@ -3,12 +3,13 @@ import os
 
 from tqdm import tqdm
 
-from src import db_utility, paths
+from src import db_utility, paths, pipeline_metrics
 
 
 def main():
-    with db_utility.connect_to_db() as conn:
+    with pipeline_metrics.stage("03_write_reviews"), db_utility.connect_to_db() as conn:
         write_reviews(conn)
+        db_utility.bump_data_version(conn, "reviews")
     
     print("All store reviews written successfully!")
 
@@ -22,17 +23,83 @@ def write_reviews(conn):
         with open(filepath, "r", encoding="utf-8") as f:
             data = json.load(f)
 
-        with conn:
-            for item in data:
-                write_review(conn, item, appid)
+        # rollups are updated in the same transaction, only for reviews that were actually new
+        with pipeline_metrics.timed("file_write_seconds"), conn:
+            reviewerids = write_reviewers(conn, data)
+            inserted = [item["recommendationid"] for item in data if write_review(conn, item, appid, reviewerids)]
+            if inserted:
+                with pipeline_metrics.timed("rollup_write_seconds"):
+                    db_utility.write_review_rollups(conn, [int(i) for i in inserted])
+        pipeline_metrics.count("files_read_total")
+        pipeline_metrics.count("bytes_read_total", os.path.getsize(filepath))
+        pipeline_metrics.count("rows_written_total", len(inserted), table="reviews")
+        pipeline_metrics.count("rows_skipped_total", len(data) - len(inserted), table="reviews")
 
 
-def write_review(conn, item, appid):
+def write_reviewers(conn, data):
+    """
+    Make sure every author of a review file has a reviewers row, returns {steamid: reviewerid}.
+
+    Only unknown steamids reach the INSERT, so known reviewers never use up a value of the reviewerid sequence
+    (ON CONFLICT would call nextval for every row). Author stats are only overwritten by newer reviews.
+    """
+    latest = {}
+    for item in data:
+        author = item.get("author", {})
+        steamid = int(author.get("steamid", 0))
+        created = item.get("timestamp_created") or 0
+        if steamid not in latest or created > latest[steamid][2]:
+            latest[steamid] = (author.get("num_games_owned"), author.get("num_reviews"), created)
+    if not latest:
+        return {}
+
+    authors = {
+        "steamids": list(latest),
+        "num_games_owned": [stats[0] for stats in latest.values()],
+        "num_reviews": [stats[1] for stats in latest.values()],
+        "timestamps": [stats[2] for stats in latest.values()],
+    }
+    AUTHORS_SQL = """
+SELECT *
+FROM unnest(%(steamids)s::bigint[], %(num_games_owned)s::int[], %(num_reviews)s::int[], %(timestamps)s::bigint[])
+    AS a(steamid, num_games_owned, num_reviews, stats_timestamp)
+"""
+    SQL = f"""
+INSERT INTO reviewers (steamid, num_games_owned, num_reviews, stats_updated)
+SELECT a.steamid, a.num_games_owned, a.num_reviews, to_timestamp(a.stats_timestamp)
+FROM ({AUTHORS_SQL}) a
+WHERE NOT EXISTS (SELECT 1 FROM reviewers r WHERE r.steamid = a.steamid)
+ON CONFLICT (steamid) DO NOTHING;
+
+UPDATE reviewers r
+SET
+    num_games_owned = a.num_games_owned,
+    num_reviews = a.num_reviews,
+    stats_updated = to_timestamp(a.stats_timestamp)
+FROM ({AUTHORS_SQL}) a
+WHERE r.steamid = a.steamid
+AND to_timestamp(a.stats_timestamp) > COALESCE(r.stats_updated, '-infinity');
+
+SELECT steamid, reviewerid
+FROM reviewers
+WHERE steamid = ANY(%(steamids)s::bigint[]);
+"""
+    with conn.cursor() as cur:
+        cur.execute(SQL, authors)
+        return dict(cur.fetchall())
+
+
+def write_review(conn, item, appid, reviewerids):
+    """Insert a review, returns False if it already existed."""
     SQL = """
 INSERT INTO reviews (
     recommendationid,
     appid,
-    author,
+    reviewerid,
+    playtime_forever,
+    playtime_last_two_weeks,
+    playtime_at_review,
+    last_played,
     review,
     timestamp_created,
     timestamp_updated,
@@ -48,15 +115,11 @@ INSERT INTO reviews (
 VALUES (
     %(recommendationid)s,
     %(appid)s,
-    ROW(
-        %(steamid)s,
-        %(num_games_owned)s,
-        %(num_reviews)s,
-        %(playtime_forever)s,
-        %(playtime_last_two_weeks)s,
-        %(playtime_at_review)s,
-        to_timestamp(%(timestamp_created)s)
-    )::review_author,
+    %(reviewerid)s,
+    %(playtime_forever)s,
+    %(playtime_last_two_weeks)s,
+    %(playtime_at_review)s,
+    to_timestamp(%(last_played)s),
     %(review)s,
     to_timestamp(%(timestamp_created)s),
     to_timestamp(%(timestamp_updated)s),
@@ -78,9 +141,7 @@ ON CONFLICT (recommendationid) DO NOTHING;
             {
                 "recommendationid": int(item["recommendationid"]),
                 "appid": appid,
-                "steamid": int(author.get("steamid", 0)),
-                "num_games_owned": author.get("num_games_owned"),
-                "num_reviews": author.get("num_reviews"),
+                "reviewerid": reviewerids[int(author.get("steamid", 0))],
                 "playtime_forever": author.get("playtime_forever"),
                 "playtime_last_two_weeks": author.get("playtime_last_two_weeks"),
                 "playtime_at_review": author.get("playtime_at_review"),
@@ -98,6 +159,7 @@ ON CONFLICT (recommendationid) DO NOTHING;
                 "primarily_steam_deck": item.get("primarily_steam_deck"),
             },
         )
+        return cur.rowcount == 1
 
 
 
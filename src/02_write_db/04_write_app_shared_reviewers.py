@@ -1,21 +1,24 @@
 from tqdm import tqdm
 
-from src import db_utility
+from src import db_utility, pipeline_metrics
 
 
 def main():
     try:
-        with db_utility.connect_to_db() as conn:
+        with pipeline_metrics.stage("04_write_app_shared_reviewers"), db_utility.connect_to_db() as conn:
             with tqdm(total=1, desc="1/3: Creating stage table", unit="step") as pbar:
-                create_app_shared_reviewers_stage(conn)
+                with pipeline_metrics.timed("step_seconds", step="create_app_shared_reviewers_stage"):
+                    create_app_shared_reviewers_stage(conn)
                 pbar.update(1)
             
             with tqdm(total=1, desc="2/3: Copying to main table", unit="step") as pbar:
-                copy_to_app_shared_reviewers(conn)
+                with pipeline_metrics.timed("step_seconds", step="copy_to_app_shared_reviewers"):
+                    copy_to_app_shared_reviewers(conn)
                 pbar.update(1)
             
             with tqdm(total=1, desc="3/3: Dropping stage table", unit="step") as pbar:
-                drop_app_shared_reviewers_stage(conn)
+                with pipeline_metrics.timed("step_seconds", step="drop_app_shared_reviewers_stage"):
+                    drop_app_shared_reviewers_stage(conn)
                 pbar.update(1)
     
     except ValueError as e:
@@ -30,7 +33,7 @@ def create_app_shared_reviewers_stage(conn):
 CREATE UNLOGGED TABLE app_shared_reviewers_stage AS
 WITH a AS (
     SELECT DISTINCT
-        (author).steamid AS steamid,
+        reviewerid,
         appid
     FROM reviews
 ),
@@ -47,7 +50,7 @@ SELECT
     COUNT(*)                     AS shared_reviewers
 FROM a a1
 JOIN a a2
-  ON a1.steamid = a2.steamid
+  ON a1.reviewerid = a2.reviewerid
  AND a1.appid < a2.appid
 JOIN rc rc1 ON rc1.appid = LEAST(a1.appid, a2.appid)
 JOIN rc rc2 ON rc2.appid = GREATEST(a1.appid, a2.appid)
@@ -0,0 +1,75 @@
+from tqdm import tqdm
+
+from src import db_utility, pipeline_metrics
+
+
+# Settings
+BATCH_SIZE = 10000
+
+
+def main():
+    with pipeline_metrics.stage("05_write_review_search_index"), db_utility.connect_to_db() as conn:
+        backfill_review_tsv(conn)
+        with pipeline_metrics.timed("index_build_seconds", index="idx_reviews_review_tsv"):
+            create_review_tsv_index(conn)
+    print("Review search index written successfully!")
+
+
+def backfill_review_tsv(conn):
+    """
+    Fill reviews.review_tsv for rows written before the trigger existed.
+
+    Walks the primary key in batches of BATCH_SIZE and commits after each batch,
+    so only a few rows are locked at a time and the review loader can keep inserting.
+    """
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM reviews WHERE review_tsv IS NULL;")
+            total = cur.fetchone()[0]
+
+    SELECT_BATCH_END = """
+SELECT MAX(recommendationid) FROM (
+    SELECT recommendationid
+    FROM reviews
+    WHERE recommendationid > %(last)s
+    ORDER BY recommendationid
+    LIMIT %(batch_size)s
+) AS batch;
+"""
+    UPDATE_BATCH = """
+UPDATE reviews
+SET review_tsv = to_tsvector('english', coalesce(review, ''))
+WHERE recommendationid > %(last)s
+AND recommendationid <= %(batch_end)s
+AND review_tsv IS NULL;
+"""
+    last = -2**31
+    with tqdm(total=total, desc="Indexing Reviews", unit="reviews") as pbar:
+        while True:
+            with pipeline_metrics.timed("batch_write_seconds"), conn:
+                with conn.cursor() as cur:
+                    cur.execute(SELECT_BATCH_END, {"last": last, "batch_size": BATCH_SIZE})
+                    batch_end = cur.fetchone()[0]
+                    if batch_end is None:
+                        break
+                    cur.execute(UPDATE_BATCH, {"last": last, "batch_end": batch_end})
+                    pbar.update(cur.rowcount)
+                    pipeline_metrics.count("rows_written_total", cur.rowcount, table="reviews")
+            last = batch_end
+
+
+def create_review_tsv_index(conn):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reviews_review_tsv
+ON reviews USING GIN (review_tsv);
+""")
+    finally:
+        conn.autocommit = False
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+from tqdm import tqdm
+
+from src import db_utility, pipeline_metrics
+
+
+def main():
+    with pipeline_metrics.stage("06_write_review_rollups"), db_utility.connect_to_db() as conn:
+        with tqdm(total=1, desc="Rebuilding review rollups", unit="step") as pbar, pipeline_metrics.timed("rollup_write_seconds"):
+            rebuild_review_rollups(conn)
+            pbar.update(1)
+        db_utility.bump_data_version(conn, "reviews")
+    print("Review rollups rebuilt successfully.")
+
+
+def rebuild_review_rollups(conn):
+    """Recompute both rollup tables from the whole reviews table (03_write_reviews keeps them up to date afterwards)."""
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE review_daily_rollup, review_monthly_rollup;")
+        db_utility.write_review_rollups(conn)
+
+
+if __name__ == "__main__":
+    main()
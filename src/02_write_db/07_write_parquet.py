@@ -0,0 +1,202 @@
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+from src import duckdb_utility, paths, pipeline_metrics
+
+
+# Settings
+OUTPUT_DIR = paths.PARQUET_DIRECTORY
+REVIEW_FILES_PER_PART = 500
+
+# Same columns as the PostgreSQL tables, composite types become structs.
+APPS_SCHEMA = pa.schema([
+    ("appid", pa.int32()),
+    ("name", pa.string()),
+    ("reviews", pa.struct([
+        ("total_reviews", pa.int32()),
+        ("percent_positive", pa.int32()),
+        ("review_score", pa.int32()),
+    ])),
+    ("release_date", pa.timestamp("s")),
+    ("tagids", pa.list_(pa.struct([
+        ("tagid", pa.int32()),
+        ("weight", pa.int32()),
+    ]))),
+    ("publishers", pa.list_(pa.string())),
+    ("developers", pa.list_(pa.string())),
+    ("price", pa.float64()),
+])
+
+TAGS_SCHEMA = pa.schema([
+    ("tagid", pa.int32()),
+    ("tagname", pa.string()),
+])
+
+REVIEWS_SCHEMA = pa.schema([
+    ("recommendationid", pa.int64()),
+    ("appid", pa.int32()),
+    ("author", pa.struct([
+        ("steamid", pa.int64()),
+        ("num_games_owned", pa.int32()),
+        ("num_reviews", pa.int32()),
+        ("playtime_forever", pa.int32()),
+        ("playtime_last_two_weeks", pa.int32()),
+        ("playtime_at_review", pa.int32()),
+        ("last_played", pa.timestamp("s")),
+    ])),
+    ("review", pa.string()),
+    ("timestamp_created", pa.timestamp("s")),
+    ("timestamp_updated", pa.timestamp("s")),
+    ("voted_up", pa.bool_()),
+    ("votes_funny", pa.int64()),
+    ("weighted_vote_score", pa.float64()),
+    ("comment_count", pa.int32()),
+    ("steam_purchase", pa.bool_()),
+    ("received_for_free", pa.bool_()),
+    ("written_during_early_access", pa.bool_()),
+    ("primarily_steam_deck", pa.bool_()),
+])
+
+
+def main():
+    with pipeline_metrics.stage("07_write_parquet"):
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        write_apps_parquet()
+        write_tags_parquet()
+        write_reviews_parquet()
+        with tqdm(total=1, desc="Counting app shared reviewers", unit="step") as pbar, pipeline_metrics.timed("table_write_seconds", table="app_shared_reviewers"):
+            duckdb_utility.write_app_shared_reviewers()
+            pbar.update(1)
+    print("Parquet files written successfully!")
+
+
+def write_apps_parquet():
+    json_files = [f for f in os.listdir(paths.STOREBROWSE_ITEMS_DIRECTORY) if f.endswith(".json")]
+
+    rows = []
+    for filename in tqdm(json_files, desc="Converting Apps"):
+        filepath = os.path.join(paths.STOREBROWSE_ITEMS_DIRECTORY, filename)
+        with open(filepath, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        rows.extend(app_row(item) for item in data["response"]["store_items"])
+        record_file_read(filepath)
+
+    # later batches win, like the ON CONFLICT update in 01_write_apps
+    rows = list({row["appid"]: row for row in rows}.values())
+    write_table(pa.Table.from_pylist(rows, schema=APPS_SCHEMA), os.path.join(OUTPUT_DIR, "apps.parquet"))
+    pipeline_metrics.count("rows_written_total", len(rows), table="apps")
+
+
+def app_row(item):
+    reviews_summary = item.get("reviews", {}).get("summary_filtered", {})
+    release_timestamp = item.get("release", {}).get("steam_release_date")
+    price = item.get("best_purchase_option", {}).get("final_price_in_cents", 0)
+    return {
+        "appid": item["appid"],
+        "name": item.get("name"),
+        "reviews": {
+            "total_reviews": reviews_summary.get("review_count", 0),
+            "percent_positive": reviews_summary.get("percent_positive", 0),
+            "review_score": reviews_summary.get("review_score", 0),
+        },
+        "release_date": datetime.fromtimestamp(release_timestamp) if release_timestamp else None,
+        "tagids": [{"tagid": t["tagid"], "weight": t["weight"]} for t in item.get("tags", [])],
+        "publishers": [p["name"] for p in item.get("basic_info", {}).get("publishers", [])],
+        "developers": [d["name"] for d in item.get("basic_info", {}).get("developers", [])],
+        "price": price / 100 if price is not None else None,
+    }
+
+
+def write_tags_parquet():
+    with open(paths.TAGS_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    record_file_read(paths.TAGS_FILE)
+
+    rows = [
+        {"tagid": int(tag["tagid"]), "tagname": tag["name"]}
+        for tag in data.get("response", {}).get("tags", [])
+    ]
+    write_table(pa.Table.from_pylist(rows, schema=TAGS_SCHEMA), os.path.join(OUTPUT_DIR, "tags.parquet"))
+    pipeline_metrics.count("rows_written_total", len(rows), table="tags")
+
+
+def write_reviews_parquet():
+    """Write reviews as several part files, so the raw dumps never have to fit into memory at once."""
+    json_files = [f for f in os.listdir(paths.REVIEWS_DIRECTORY) if f.endswith(".json") and not f.endswith("-failed.json")]
+
+    reviews_dir = os.path.join(OUTPUT_DIR, "reviews")
+    shutil.rmtree(reviews_dir, ignore_errors=True)
+    os.makedirs(reviews_dir)
+
+    rows = []
+    part = 0
+    for i, filename in enumerate(tqdm(json_files, desc="Converting Reviews")):
+        appid = int(os.path.splitext(filename)[0])
+        filepath = os.path.join(paths.REVIEWS_DIRECTORY, filename)
+        with open(filepath, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        rows.extend(review_row(item, appid) for item in data)
+        record_file_read(filepath)
+
+        if (i + 1) % REVIEW_FILES_PER_PART == 0 or i == len(json_files) - 1:
+            table = pa.Table.from_pylist(rows, schema=REVIEWS_SCHEMA)
+            write_table(table, os.path.join(reviews_dir, f"part-{part:05d}.parquet"))
+            pipeline_metrics.count("rows_written_total", len(rows), table="reviews")
+            rows = []
+            part += 1
+
+
+def review_row(item, appid):
+    author = item.get("author", {})
+    return {
+        "recommendationid": int(item["recommendationid"]),
+        "appid": appid,
+        "author": {
+            "steamid": int(author.get("steamid", 0)),
+            "num_games_owned": author.get("num_games_owned"),
+            "num_reviews": author.get("num_reviews"),
+            "playtime_forever": author.get("playtime_forever"),
+            "playtime_last_two_weeks": author.get("playtime_last_two_weeks"),
+            "playtime_at_review": author.get("playtime_at_review"),
+            "last_played": to_datetime(author.get("last_played")),
+        },
+        "review": item.get("review"),
+        "timestamp_created": to_datetime(item.get("timestamp_created")),
+        "timestamp_updated": to_datetime(item.get("timestamp_updated")),
+        "voted_up": item.get("voted_up"),
+        "votes_funny": item.get("votes_funny"),
+        "weighted_vote_score": float(item["weighted_vote_score"]) if item.get("weighted_vote_score") is not None else None,
+        "comment_count": item.get("comment_count"),
+        "steam_purchase": item.get("steam_purchase"),
+        "received_for_free": item.get("received_for_free"),
+        "written_during_early_access": item.get("written_during_early_access"),
+        "primarily_steam_deck": item.get("primarily_steam_deck"),
+    }
+
+
+def to_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp) if timestamp else None
+
+
+def record_file_read(filepath):
+    pipeline_metrics.count("files_read_total")
+    pipeline_metrics.count("bytes_read_total", os.path.getsize(filepath))
+
+
+def write_table(table, filepath):
+    temp_filepath = f"{filepath}.tmp"
+    with pipeline_metrics.timed("file_write_seconds"):
+        pq.write_table(table, temp_filepath)
+    os.replace(temp_filepath, filepath)
+    pipeline_metrics.record_file_written(filepath)
+
+
+if __name__ == "__main__":
+    main()
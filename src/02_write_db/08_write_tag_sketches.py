@@ -0,0 +1,16 @@
+from tqdm import tqdm
+
+from src import db_utility, pipeline_metrics, quantile_sketch
+
+
+def main():
+    with pipeline_metrics.stage("08_write_tag_sketches"), db_utility.connect_to_db() as conn:
+        with tqdm(total=1, desc="Building tag sketches", unit="step") as pbar:
+            quantile_sketch.write_tag_sketches(conn)
+            pbar.update(1)
+        db_utility.bump_data_version(conn, "tag_sketches")
+    print("Tag sketches written successfully.")
+
+
+if __name__ == "__main__":
+    main()
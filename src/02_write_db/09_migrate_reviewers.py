@@ -0,0 +1,181 @@
+from tqdm import tqdm
+
+from src import db_utility, pipeline_metrics
+
+
+def main():
+    """
+    One-off migration of a reviews table with the review_author composite column
+    to the reviewers dimension table (see DB_scheme.sql).
+
+    Run this before applying the new DB_scheme.sql, which indexes reviews.reviewerid and fails on the old table.
+    Everything the migration needs from the new schema (reviewers, review_tsv and its trigger function)
+    is created here.
+    """
+    try:
+        with pipeline_metrics.stage("09_migrate_reviewers"), db_utility.connect_to_db() as conn:
+            with tqdm(total=1, desc="1/4: Writing reviewers", unit="step") as pbar, pipeline_metrics.timed("step_seconds", step="write_reviewers"):
+                write_reviewers(conn)
+                pbar.update(1)
+
+            with tqdm(total=1, desc="2/4: Creating stage table", unit="step") as pbar, pipeline_metrics.timed("step_seconds", step="create_stage"):
+                create_reviews_stage(conn)
+                pbar.update(1)
+
+            with tqdm(total=1, desc="3/4: Indexing stage table", unit="step") as pbar, pipeline_metrics.timed("step_seconds", step="index_stage"):
+                index_reviews_stage(conn)
+                pbar.update(1)
+
+            with tqdm(total=1, desc="4/4: Replacing reviews table", unit="step") as pbar, pipeline_metrics.timed("step_seconds", step="replace"):
+                replace_reviews(conn)
+                pbar.update(1)
+
+            db_utility.bump_data_version(conn, "reviews")
+
+    except ValueError as e:
+        print(f"{e}")
+
+    else:
+        print("Migrated reviews to the reviewers table successfully.")
+
+
+def write_reviewers(conn):
+    SQL = """
+CREATE TABLE IF NOT EXISTS reviewers (
+    reviewerid SERIAL PRIMARY KEY,
+    steamid BIGINT UNIQUE NOT NULL,
+    num_games_owned INT,
+    num_reviews INT,
+    stats_updated TIMESTAMP
+);
+
+-- author stats of each steamid's latest review
+INSERT INTO reviewers (steamid, num_games_owned, num_reviews, stats_updated)
+SELECT DISTINCT ON ((author).steamid)
+    (author).steamid,
+    (author).num_games_owned,
+    (author).num_reviews,
+    timestamp_created
+FROM reviews
+ORDER BY (author).steamid, timestamp_created DESC
+ON CONFLICT (steamid) DO NOTHING;
+"""
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(SQL)
+            pipeline_metrics.count("rows_written_total", cur.rowcount, table="reviewers")
+
+
+def create_reviews_stage(conn):
+    # a fresh copy instead of UPDATE-ing every row, so the new table is compact right away
+    SQL = """
+-- from DB_scheme.sql, old databases may not have them yet (adding a nullable column doesn't rewrite the table)
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS review_tsv tsvector;
+
+CREATE OR REPLACE FUNCTION reviews_tsv_update()
+RETURNS trigger AS $$
+BEGIN
+    NEW.review_tsv := to_tsvector('english', coalesce(NEW.review, ''));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TABLE reviews_stage (
+    recommendationid INT PRIMARY KEY,
+    appid INT,
+    reviewerid INT,
+    playtime_forever INT,
+    playtime_last_two_weeks INT,
+    playtime_at_review INT,
+    last_played TIMESTAMP,
+    review TEXT,
+    timestamp_created TIMESTAMP,
+    timestamp_updated TIMESTAMP,
+    voted_up BOOLEAN,
+    votes_funny BIGINT,
+    weighted_vote_score NUMERIC,
+    comment_count INT,
+    steam_purchase BOOLEAN,
+    received_for_free BOOLEAN,
+    written_during_early_access BOOLEAN,
+    primarily_steam_deck BOOLEAN,
+    review_tsv tsvector
+);
+
+SET LOCAL synchronous_commit = OFF;
+
+INSERT INTO reviews_stage
+SELECT
+    r.recommendationid,
+    r.appid,
+    rv.reviewerid,
+    (r.author).playtime_forever,
+    (r.author).playtime_last_two_weeks,
+    (r.author).playtime_at_review,
+    (r.author).last_played,
+    r.review,
+    r.timestamp_created,
+    r.timestamp_updated,
+    r.voted_up,
+    r.votes_funny,
+    r.weighted_vote_score,
+    r.comment_count,
+    r.steam_purchase,
+    r.received_for_free,
+    r.written_during_early_access,
+    r.primarily_steam_deck,
+    r.review_tsv
+FROM reviews r
+JOIN reviewers rv ON rv.steamid = (r.author).steamid;
+"""
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(SQL)
+            pipeline_metrics.count("rows_written_total", cur.rowcount, table="reviews_stage")
+
+
+def index_reviews_stage(conn):
+    # built before the swap, so the reviews table is only locked for the rename
+    SQL = """
+CREATE INDEX idx_reviews_stage_appid ON reviews_stage (appid);
+CREATE INDEX idx_reviews_stage_reviewerid ON reviews_stage (reviewerid, appid);
+CREATE INDEX idx_reviews_stage_timestamp_created ON reviews_stage (timestamp_created);
+CREATE INDEX idx_reviews_stage_review_tsv ON reviews_stage USING GIN (review_tsv);
+"""
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(SQL)
+
+
+def replace_reviews(conn):
+    with conn:  # transaction ensures atomicity
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM reviews_stage;")
+            stage_count = cur.fetchone()[0]
+            cur.execute("SELECT COUNT(*) FROM reviews;")
+            main_count = cur.fetchone()[0]
+
+            if stage_count != main_count:
+                raise ValueError(
+                    f"Won’t replace reviews table: row count mismatch "
+                    f"(reviews_stage has {stage_count} rows, "
+                    f"reviews has {main_count} rows)."
+                )
+
+            cur.execute("""
+DROP TABLE reviews;
+ALTER TABLE reviews_stage RENAME TO reviews;
+ALTER INDEX reviews_stage_pkey RENAME TO reviews_pkey;
+ALTER INDEX idx_reviews_stage_appid RENAME TO idx_reviews_appid;
+ALTER INDEX idx_reviews_stage_reviewerid RENAME TO idx_reviews_reviewerid;
+ALTER INDEX idx_reviews_stage_timestamp_created RENAME TO idx_reviews_timestamp_created;
+ALTER INDEX idx_reviews_stage_review_tsv RENAME TO idx_reviews_review_tsv;
+
+CREATE OR REPLACE TRIGGER trg_reviews_tsv
+BEFORE INSERT OR UPDATE OF review ON reviews
+FOR EACH ROW EXECUTE FUNCTION reviews_tsv_update();
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+from tqdm import tqdm
+
+from src import db_utility, pipeline_metrics, paths, reviewer_index
+
+
+def main():
+    with pipeline_metrics.stage("10_write_reviewer_index"), db_utility.connect_to_db() as conn:
+        with tqdm(total=1, desc="Building reviewer index", unit="step") as pbar:
+            reviewer_index.write_reviewer_index(conn)
+            pbar.update(1)
+    print(f"Reviewer index written to {paths.REVIEWER_INDEX_DIRECTORY} successfully.")
+
+
+if __name__ == "__main__":
+    main()
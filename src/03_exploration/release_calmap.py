@@ -5,18 +5,19 @@ import pandas as pd
 from src import db_utility, exploration_utility
 
 
-def release_calmap(filename, years=None, merge_years=False, normalize_years=True, shorten_year_labels=False, force_year_labels=None):
-    SQL = """
-SELECT release_date FROM apps
-WHERE release_date IS NOT NULL;
+def release_calmap(filename, years=None, merge_years=False, normalize_years=True, shorten_year_labels=False, force_year_labels=None, preview=None):
+    SQL = f"""
+SELECT
+    date_trunc('day', release_date)::date AS release_day,
+    COUNT(*) AS releases
+FROM apps {exploration_utility.get_sample_clause(preview)}
+WHERE release_date IS NOT NULL
+GROUP BY release_day
+ORDER BY release_day;
 """
-    with db_utility.connect_to_db() as conn:
-        df = pd.read_sql(SQL, conn)
+    df = db_utility.read_sql(SQL)
 
-    df["release_date"] = pd.to_datetime(df["release_date"])
-    daily_counts = df.groupby(df["release_date"].dt.date).size()
-    daily_counts.index = pd.to_datetime(daily_counts.index)
-    daily_counts = daily_counts.sort_index()
+    daily_counts = pd.Series(df["releases"].to_numpy() * exploration_utility.get_preview_scale(preview), index=pd.to_datetime(df["release_day"]))
     
     today = pd.Timestamp.today().normalize()
     daily_counts = daily_counts[daily_counts.index <= today]
@@ -60,9 +61,17 @@ WHERE release_date IS NOT NULL;
     plt.suptitle("Steam Game Releases")
     plt.tight_layout()
     plt.savefig(exploration_utility.get_full_filename(filename), dpi=300)
+    plt.close()
 
 
+SOURCES = ["apps"]
+
+FIGURES = [
+    (release_calmap, "release_calmap_01.png", {"years": range(2010, 2025 + 1)}),
+    (release_calmap, "release_calmap_02.png", {"merge_years": True}),
+]
+
 
 if __name__ == "__main__":
-    release_calmap("release_calmap_01.png", range(2010, 2025 + 1))
-    release_calmap("release_calmap_02.png", merge_years=True)
+    for function, filename, kwargs in FIGURES:
+        function(filename, **kwargs)
@@ -0,0 +1,173 @@
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+
+from src import db_utility, exploration_utility, paths
+
+
+# Settings
+PACKAGE = "src.03_exploration"
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_PATH = os.path.join(paths.EXPLORATION_OUTPUT_DIR, ".render_manifest.json")
+PREVIEW_DIR = "preview"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render all exploration figures in parallel.")
+    parser.add_argument("--force", action="store_true", help="render even if the inputs did not change")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of render processes")
+    parser.add_argument("--only", nargs="*", help="only render figures whose filename contains one of these strings")
+    parser.add_argument("--preview", type=float, help="draft from a sample of this fraction of the rows (e.g. 0.01), written to preview/")
+    args = parser.parse_args()
+
+    matplotlib.use("Agg")
+    render_figures(force=args.force, workers=args.workers, only=args.only, preview=args.preview)
+
+
+def discover_figures():
+    """
+    Collect (module name, index, function, filename, kwargs) for every entry
+    of the FIGURES lists in the exploration modules.
+    """
+    figures = []
+    for filename in sorted(os.listdir(PACKAGE_DIR)):
+        if not filename.endswith(".py") or filename.startswith("__"):
+            continue
+        module_name = f"{PACKAGE}.{os.path.splitext(filename)[0]}"
+        module = importlib.import_module(module_name)
+        for index, (function, output_filename, kwargs) in enumerate(getattr(module, "FIGURES", [])):
+            figures.append((module_name, index, function, output_filename, kwargs))
+    return figures
+
+
+def render_figures(force=False, workers=None, only=None, preview=None):
+    """
+    Render every figure whose inputs changed since its last render.
+
+    With `preview` all figures are drafted from a sample into preview/, always re-rendered
+    and never recorded in the manifest, so the exact render still runs afterwards.
+    """
+    os.makedirs(paths.EXPLORATION_OUTPUT_DIR, exist_ok=True)
+    if preview:
+        os.makedirs(os.path.join(paths.EXPLORATION_OUTPUT_DIR, PREVIEW_DIR), exist_ok=True)
+
+    figures = discover_figures()
+    if only:
+        figures = [f for f in figures if any(pattern in f[3] for pattern in only)]
+
+    backend = db_utility.get_backend()
+    versions = db_utility.read_data_versions()
+    manifest = load_manifest()
+
+    pending = []
+    for module_name, index, function, filename, kwargs in figures:
+        missing = get_missing_sources(module_name, versions) if backend == "duckdb" else []
+        if missing:
+            print(f"  [skip] {filename} ({', '.join(missing)} not available on {backend})")
+            continue
+        fingerprint = get_fingerprint(module_name, function, kwargs, versions)
+        output_file = exploration_utility.get_full_filename(filename)
+        if not force and not preview and manifest.get(filename) == fingerprint and os.path.exists(output_file):
+            print(f"  [skip] {filename} (inputs unchanged)")
+            continue
+        pending.append((module_name, index, filename, fingerprint))
+
+    if not pending:
+        print("All figures are up to date.")
+        return
+
+    # fetch the shared data once, the workers only memory-map the snapshot files
+    snapshot_files = exploration_utility.update_snapshots()
+
+    # DuckDB connections aren't fork-safe and the parent opened one for the snapshots, so start fresh workers
+    mp_context = multiprocessing.get_context("spawn") if backend == "duckdb" else None
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=init_worker, initargs=(snapshot_files,)) as executor:
+        futures = {
+            executor.submit(render_figure, module_name, index, preview): (filename, fingerprint)
+            for module_name, index, filename, fingerprint in pending
+        }
+        for future in as_completed(futures):
+            filename, fingerprint = futures[future]
+            try:
+                duration = future.result()
+            except Exception as e:
+                print(f"  [fail] {filename}: {e}")
+                continue
+            print(f"  [done] {filename} ({duration:.2f} s)")
+            if preview:
+                continue
+            manifest[filename] = fingerprint
+            save_manifest(manifest)
+
+    print(f"Rendered {len(pending)} figures in {time.perf_counter() - start:.2f} s.")
+
+
+def init_worker(snapshot_files):
+    matplotlib.use("Agg")
+    exploration_utility.snapshot_files.update(snapshot_files)
+
+
+def render_figure(module_name, index, preview=None):
+    module = importlib.import_module(module_name)
+    function, filename, kwargs = module.FIGURES[index]
+    if preview:
+        filename = f"{PREVIEW_DIR}/{filename}"
+        # figures read from precomputed sketches have no preview option, they are already cheap
+        if "preview" in inspect.signature(function).parameters:
+            kwargs = {**kwargs, "preview": preview}
+    start = time.perf_counter()
+    function(filename, **kwargs)
+    return time.perf_counter() - start
+
+
+def get_missing_sources(module_name, versions):
+    """SOURCES of a module that the backend has no data versions for, i.e. tables it doesn't have."""
+    sources = getattr(importlib.import_module(module_name), "SOURCES", [])
+    return [name for name in sources if name not in versions]
+
+
+def get_fingerprint(module_name, function, kwargs, versions):
+    """
+    Hash of everything a figure depends on: plot code, arguments and the data versions of its module's SOURCES
+    (the data_versions entries the module reads), so unrelated writes don't re-render it.
+
+    Modules without SOURCES depend on every data version.
+    """
+    module = importlib.import_module(module_name)
+    sources = getattr(module, "SOURCES", None)
+    if sources is not None:
+        versions = {name: versions.get(name) for name in sources}
+    hasher = hashlib.sha256()
+    for source_file in (module.__file__, exploration_utility.__file__):
+        with open(source_file, "rb") as f:
+            hasher.update(f.read())
+    hasher.update(function.__name__.encode())
+    hasher.update(repr(sorted(kwargs.items())).encode())
+    hasher.update(json.dumps(versions, sort_keys=True).encode())
+    return hasher.hexdigest()
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,8 @@
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 from matplotlib.ticker import StrMethodFormatter
 
-from src import db_utility, exploration_utility
+from src import exploration_utility, quantile_sketch
 
 
 def revenue_distribution(filename,
@@ -11,22 +10,34 @@ def revenue_distribution(filename,
                          revenue_scale="linear",
                          tag_whitelist=None,
                          tag_blacklist=None,
-                         subtitle=None):
-    SQL = f"""
-SELECT revenue_estimate FROM apps_view
-WHERE price IS NOT NULL
-AND price > 0
-AND tags_filter(tagids, '{db_utility.assemble_list(tag_whitelist)}', '{db_utility.assemble_list(tag_blacklist)}');
-"""
-    with db_utility.connect_to_db() as conn:
-        df = pd.read_sql(SQL, conn)
-    
-    if df.empty:
-        print("No data found for the given filters.")
-        return
-    
-    revenue_sorted = np.sort(df["revenue_estimate"])
-    x = np.arange(len(revenue_sorted))
+                         subtitle=None,
+                         from_sketch=False,
+                         preview=None):
+    if from_sketch:
+        # precomputed per-tag t-digest, no scan over the apps
+        if tag_blacklist or len(tag_whitelist or []) > 1:
+            raise ValueError("from_sketch supports at most one whitelisted tag and no blacklist")
+        digest = quantile_sketch.read_merged_sketch("revenue_estimate", tag_whitelist)
+        if digest.count == 0:
+            print("No data found for the given filters.")
+            return
+        x = np.linspace(0, digest.count - 1, 1001)
+        revenue_sorted = digest.quantile(np.linspace(0, 1, 1001))
+    else:
+        df = exploration_utility.read_snapshot(
+            "apps",
+            columns=["revenue_estimate", "tagids"],
+            filters=[("price", ">", 0)])
+        if preview:
+            df = df.sample(frac=preview, random_state=exploration_utility.PREVIEW_SEED)
+        df = df[exploration_utility.tags_filter(df["tagids"], tag_whitelist, tag_blacklist)]
+
+        if df.empty:
+            print("No data found for the given filters.")
+            return
+
+        revenue_sorted = np.sort(df["revenue_estimate"])
+        x = np.arange(len(revenue_sorted)) * exploration_utility.get_preview_scale(preview)
 
     if max_revenue is None:
         max_revenue = revenue_sorted[-1]
@@ -41,7 +52,7 @@ AND tags_filter(tagids, '{db_utility.assemble_list(tag_whitelist)}', '{db_utilit
         if (i == 50):
             continue
         ax.axvline(np.percentile(x, i), color='gray', linestyle='--', linewidth=0.8, alpha=0.7)
-    plt.xlim(0, len(df) - 1)
+    plt.xlim(0, x[-1])
     plt.ylim(0, max_revenue)
     ax.set_xticklabels([f"{i}%" for i in range(0, 101, 10)])
     ax.yaxis.set_major_formatter(StrMethodFormatter('${x:,.0f}'))
@@ -50,12 +61,20 @@ AND tags_filter(tagids, '{db_utility.assemble_list(tag_whitelist)}', '{db_utilit
     plt.suptitle(exploration_utility.combine_lines("Revenue Distribution", subtitle))
     plt.tight_layout()
     plt.savefig(exploration_utility.get_full_filename(filename), dpi=300)
+    plt.close(fig)
+
+
+SOURCES = ["apps_materialized_view"]  # none of the FIGURES use from_sketch
 
+FIGURES = [
+    (revenue_distribution, "revenue_distribution_01.png", {"revenue_scale": "linear"}),
+    (revenue_distribution, "revenue_distribution_01_log.png", {"revenue_scale": "log"}),
+    (revenue_distribution, "revenue_distribution_02.png", {"revenue_scale": "linear", "max_revenue": 1000000}),
+    (revenue_distribution, "revenue_distribution_03.png", {"revenue_scale": "log", "tag_whitelist": [1091588], "subtitle": "Tag = Roguelike Deckbuilder"}),
+    (revenue_distribution, "revenue_distribution_04.png", {"revenue_scale": "log", "tag_whitelist": [5432], "subtitle": "Tag = Programming"}),
+]
 
 
 if __name__ == "__main__":
-    revenue_distribution("revenue_distribution_01.png", revenue_scale="linear")
-    revenue_distribution("revenue_distribution_01_log.png", revenue_scale="log")
-    revenue_distribution("revenue_distribution_02.png", revenue_scale="linear", max_revenue=1000000)
-    revenue_distribution("revenue_distribution_03.png", revenue_scale="log", tag_whitelist=[1091588], subtitle="Tag = Roguelike Deckbuilder")
-    revenue_distribution("revenue_distribution_04.png", revenue_scale="log", tag_whitelist=[5432], subtitle="Tag = Programming")
+    for function, filename, kwargs in FIGURES:
+        function(filename, **kwargs)
@@ -1,40 +1,72 @@
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 from matplotlib import colors
 
 from src import db_utility, exploration_utility
 
 
-def review_heatmap(filename, review_min = 0, review_max = -1, review_scale="linear"):
-    SQL = """
-SELECT 
-    (reviews).total_reviews AS total_reviews,
-    (reviews).percent_positive AS percent_positive
-FROM apps;
-"""
-    with db_utility.connect_to_db() as conn:
-        df = pd.read_sql(SQL, conn)
+X_BINS = 99
+Y_BINS = 100
 
-    if review_max < 0:
-        review_max = df["total_reviews"].max()
 
+def review_heatmap(filename, review_min = 0, review_max = -1, review_scale="linear", preview=None):
     if review_scale=="linear":
-        x_bins = np.linspace(0, review_max, 100)
+        x_expr, x_lo, x_hi = "(a.reviews).total_reviews", "0", "b.review_max"
     elif review_scale=="log":
         review_min = max(review_min, 1)
-        x_bins = np.logspace(np.log10(review_min), np.log10(review_max), 100)
+        x_expr, x_lo, x_hi = "ln((a.reviews).total_reviews)", "ln(b.review_min)", "ln(b.review_max)"
     else:
         raise ValueError("Unknown review_scale")
 
-    df = df[df["total_reviews"] >= review_min]
-    y_bins = np.linspace(0, 100, 101)
+    sample = exploration_utility.get_sample_clause(preview)
+    # only scan apps for the maximum if none is given
+    params = {"review_min": review_min}
+    if review_max >= 0:
+        review_max_expr = "%(review_max)s::float8"
+        params["review_max"] = review_max
+    else:
+        review_max_expr = f"(SELECT MAX((reviews).total_reviews) FROM apps {sample})::float8"
+
+    # binning happens in the DB, only the non-empty bins are transferred.
+    # LEAST(...) puts values equal to the upper edge into the last bin, like np.histogram2d does.
+    SQL = f"""
+WITH bounds AS (
+    SELECT
+        %(review_min)s::float8 AS review_min,
+        {review_max_expr} AS review_max
+)
+SELECT
+    b.review_max AS review_max,
+    LEAST(width_bucket({x_expr}, {x_lo}, {x_hi}, {X_BINS}), {X_BINS}) AS x_bucket,
+    LEAST(width_bucket((a.reviews).percent_positive, 0, 100, {Y_BINS}), {Y_BINS}) AS y_bucket,
+    COUNT(*) AS games
+FROM apps a {sample}
+CROSS JOIN bounds b
+WHERE (a.reviews).total_reviews BETWEEN b.review_min AND b.review_max
+AND (a.reviews).percent_positive BETWEEN 0 AND 100
+GROUP BY 1, 2, 3;
+"""
+    df = db_utility.read_sql(SQL, params)
+
+    if df.empty:
+        print("No data found for the given filters.")
+        return
+
+    review_max = df["review_max"].iloc[0]
+    if review_scale=="linear":
+        x_bins = np.linspace(0, review_max, X_BINS + 1)
+    else:
+        x_bins = np.logspace(np.log10(review_min), np.log10(review_max), X_BINS + 1)
+    y_bins = np.linspace(0, 100, Y_BINS + 1)
+
+    counts = np.zeros((X_BINS, Y_BINS))
+    counts[df["x_bucket"].to_numpy() - 1, df["y_bucket"].to_numpy() - 1] = df["games"].to_numpy() * exploration_utility.get_preview_scale(preview)
 
     plt.figure()
-    plt.hist2d(
-        df["total_reviews"],
-        df["percent_positive"],
-        bins=[x_bins, y_bins],
+    plt.pcolormesh(
+        x_bins,
+        y_bins,
+        counts.T,
         cmap="plasma",
         norm=colors.LogNorm(vmin=1)
     )
@@ -50,7 +82,14 @@ FROM apps;
     plt.close()
 
 
+SOURCES = ["apps"]
+
+FIGURES = [
+    (review_heatmap, "review_heatmap_01.png", {"review_min": 100, "review_max": 10000}),
+    (review_heatmap, "review_heatmap_02.png", {"review_min": 10, "review_scale": "log"}),
+]
+
 
 if __name__ == "__main__":
-    review_heatmap("review_heatmap_01.png", review_min=100, review_max=10000)
-    review_heatmap("review_heatmap_02.png", review_min=10, review_scale="log")
+    for function, filename, kwargs in FIGURES:
+        function(filename, **kwargs)
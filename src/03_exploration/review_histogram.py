@@ -1,28 +1,33 @@
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 
 from src import db_utility, exploration_utility
 
 
-def review_histogram(filename, max=100000, bin_width = 500):
-    SQL = """
-SELECT 
-    appid,
-    name,
-    (reviews).total_reviews AS total_reviews,
-    (reviews).percent_positive AS percent_positive,
-    release_date
-FROM apps;
-"""
-    with db_utility.connect_to_db() as conn:
-        df = pd.read_sql(SQL, conn)
-    
-    reviews = df["total_reviews"]
+def review_histogram(filename, max=100000, bin_width = 500, preview=None):
     bins = np.arange(0, max + bin_width, bin_width)
+    bin_count = len(bins) - 1
+
+    # only the per-bin counts leave the DB
+    SQL = f"""
+SELECT
+    LEAST(width_bucket((reviews).total_reviews, %(low)s, %(high)s, %(bin_count)s), %(bin_count)s) AS bucket,
+    COUNT(*) AS games
+FROM apps {exploration_utility.get_sample_clause(preview)}
+WHERE (reviews).total_reviews BETWEEN %(low)s AND %(high)s
+GROUP BY bucket;
+"""
+    df = db_utility.read_sql(SQL, {
+        "low": int(bins[0]),
+        "high": int(bins[-1]),
+        "bin_count": bin_count,
+    })
+
+    counts = np.zeros(bin_count)
+    counts[df["bucket"].to_numpy() - 1] = df["games"].to_numpy() * exploration_utility.get_preview_scale(preview)
 
     plt.figure()
-    plt.hist(reviews, bins=bins)
+    plt.hist(bins[:-1], bins=bins, weights=counts)
     plt.xlabel("Total Reviews")
     plt.ylabel("Number of Games")
     plt.xlim(left=1, right=max)
@@ -30,8 +35,16 @@ FROM apps;
     plt.yscale('log')
     plt.suptitle("Distribution of Review Counts")
     plt.savefig(exploration_utility.get_full_filename(filename), dpi=600)
+    plt.close()
+
+
+SOURCES = ["apps"]
 
+FIGURES = [
+    (review_histogram, "review_histogram.png", {}),
+]
 
 
 if __name__ == "__main__":
-    review_histogram("review_histogram.png")
+    for function, filename, kwargs in FIGURES:
+        function(filename, **kwargs)
@@ -0,0 +1,79 @@
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from src import db_utility, exploration_utility
+
+
+def review_timeseries(filename,
+                      resolution="month",
+                      appids=None,
+                      tag_whitelist=None,
+                      tag_blacklist=None,
+                      subtitle=None,
+                      preview=None):
+    if resolution == "day":
+        table, period = "review_daily_rollup", "day"
+    elif resolution == "month":
+        table, period = "review_monthly_rollup", "month"
+    else:
+        raise ValueError("Unknown resolution")
+
+    # reads the pre-aggregated rollups, never the reviews table itself
+    SQL = f"""
+SELECT
+    r.{period} AS period,
+    SUM(r.reviews) AS reviews,
+    SUM(r.positive) AS positive,
+    SUM(r.steam_deck) AS steam_deck
+FROM {table} r {exploration_utility.get_sample_clause(preview, "BERNOULLI")}
+JOIN apps a ON a.appid = r.appid
+WHERE (%(appids)s::int[] IS NULL OR r.appid IN (SELECT unnest(%(appids)s::int[])))
+AND tags_filter(a.tagids, %(whitelist)s::int[], %(blacklist)s::int[])
+GROUP BY r.{period}
+ORDER BY r.{period};
+"""
+    df = db_utility.read_sql(SQL, {
+        "appids": list(appids) if appids is not None else None,
+        "whitelist": list(tag_whitelist) if tag_whitelist is not None else None,
+        "blacklist": list(tag_blacklist) if tag_blacklist is not None else None,
+    })
+
+    if df.empty:
+        print("No data found for the given filters.")
+        return
+
+    df["period"] = pd.to_datetime(df["period"])
+    scale = exploration_utility.get_preview_scale(preview)
+    df[["reviews", "positive", "steam_deck"]] = df[["reviews", "positive", "steam_deck"]].astype(float) * scale
+    percent_positive = 100 * df["positive"] / df["reviews"]
+
+    fig, ax = plt.subplots()
+    ax.plot(df["period"], df["reviews"], label="Reviews")
+    ax.plot(df["period"], df["steam_deck"], label="Steam Deck Reviews")
+    ax.set_yscale("log")
+    ax.set_xlabel("Date")
+    ax.set_ylabel(f"Reviews per {period.capitalize()}")
+    ax.legend(loc="upper left")
+
+    ax2 = ax.twinx()
+    ax2.plot(df["period"], percent_positive, color="gray", linewidth=0.8, alpha=0.7)
+    ax2.set_ylim(0, 100)
+    ax2.set_ylabel("Percent Positive")
+
+    plt.suptitle(exploration_utility.combine_lines("Review Volume", subtitle))
+    plt.tight_layout()
+    plt.savefig(exploration_utility.get_full_filename(filename), dpi=300)
+    plt.close(fig)
+
+
+SOURCES = ["reviews", "apps"]  # the rollups are written together with the reviews
+
+FIGURES = [
+    (review_timeseries, "review_timeseries_01.png", {}),
+    (review_timeseries, "review_timeseries_02.png", {"tag_whitelist": [1091588], "subtitle": "Tag = Roguelike Deckbuilder"}),
+]
+
+
+if __name__ == "__main__":
+    for function, filename, kwargs in FIGURES:
+        function(filename, **kwargs)
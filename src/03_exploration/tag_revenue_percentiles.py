@@ -0,0 +1,55 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib import colors
+
+from src import db_utility, exploration_utility, quantile_sketch
+
+
+def tag_revenue_percentiles(filename, min_games=50, metric="revenue_estimate"):
+    """Percentile curves of all tags at once, one row per tag, read from the precomputed tag sketches."""
+    sketches = quantile_sketch.read_sketches(metric)
+    sketches.pop(quantile_sketch.ALL_APPS_TAGID, None)
+    sketches = {tagid: digest for tagid, digest in sketches.items() if digest.count >= min_games}
+    if not sketches:
+        print("No data found for the given filters.")
+        return
+
+    tags = db_utility.read_sql("SELECT tagid, tagname FROM tags;")
+    tagnames = dict(zip(tags["tagid"], tags["tagname"]))
+
+    percentiles = np.linspace(0, 1, 101)
+    df = pd.DataFrame(
+        {tagid: digest.quantile(percentiles) for tagid, digest in sketches.items()},
+        index=percentiles).T
+    df = df.sort_values(0.5)
+
+    fig, ax = plt.subplots(figsize=(plt.rcParams["figure.figsize"][0], 2 + 0.1 * len(df)))
+    # one cell per percentile, centered on it
+    mesh = ax.pcolormesh(
+        np.linspace(-0.5, 100.5, len(percentiles) + 1),
+        np.arange(len(df) + 1),
+        df.to_numpy(),
+        cmap="plasma",
+        norm=colors.LogNorm(vmin=max(df.to_numpy().min(), 1)))
+    fig.colorbar(mesh, label=metric)
+    ax.set_yticks(np.arange(len(df)) + 0.5)
+    ax.set_yticklabels([tagnames.get(tagid, str(tagid)) for tagid in df.index], fontsize=4)
+    ax.set_xlim(0, 100)
+    ax.set_xlabel("Percentile")
+    plt.suptitle(f"{metric} Percentiles per Tag\n(tags with ≥ {min_games} games, sorted by median)")
+    plt.tight_layout()
+    plt.savefig(exploration_utility.get_full_filename(filename), dpi=300)
+    plt.close(fig)
+
+
+SOURCES = ["tag_sketches", "tags"]
+
+FIGURES = [
+    (tag_revenue_percentiles, "tag_revenue_percentiles.png", {}),
+]
+
+
+if __name__ == "__main__":
+    for function, filename, kwargs in FIGURES:
+        function(filename, **kwargs)
@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+from tqdm import tqdm
+
+from src import paths
+
+
+# Settings
+BATCH_SIZE = 100
+FIRST_STEAMID = 76561197960265728
+WORDS = (
+    "game fun great bad boring performance crash bug story graphics music controls "
+    "multiplayer friends price worth hours early access update devs recommend refund "
+    "difficult easy addictive masterpiece lag fps steam deck runs well poorly"
+).split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic storebrowse items, tags and reviews.")
+    parser.add_argument("--output-dir", default=paths.SYNTHETIC_DATA_DIRECTORY)
+    parser.add_argument("--apps", type=int, default=2000, help="number of apps")
+    parser.add_argument("--tags", type=int, default=450, help="number of tags")
+    parser.add_argument("--reviewers", type=int, default=50000, help="size of the reviewer pool")
+    parser.add_argument("--max-reviews", type=int, default=20000, help="reviews of the most reviewed app")
+    parser.add_argument("--zipf", type=float, default=1.1, help="exponent of the review count and reviewer activity distributions")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate_synthetic_data(**vars(args))
+
+
+def generate_synthetic_data(output_dir, apps, tags, reviewers, max_reviews, zipf, seed):
+    """
+    Write a dataset in the same layout as the raw downloads:
+
+    - <output_dir>/steam_tags.json: like paths.TAGS_FILE
+    - <output_dir>/storebrowse_items/<first>-<last>.json: like 03_download_storebrowse_items
+    - <output_dir>/appreviews/<appid>.json: like 04_download_appreviews
+
+    Review counts per app follow a Zipf distribution (max_reviews / rank^zipf), capped at the reviewer pool size.
+    Reviewers are drawn from one shared pool with Zipf weights, so active reviewers review many apps.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.join(output_dir, "storebrowse_items"), exist_ok=True)
+    os.makedirs(os.path.join(output_dir, "appreviews"), exist_ok=True)
+
+    tagids = write_tags(output_dir, tags)
+
+    appids = np.arange(10, 10 * (apps + 1), 10)
+    review_counts = np.maximum((max_reviews / np.arange(1, apps + 1) ** zipf).astype(int), 1)
+    # every review needs its own reviewer, and the store items must report the real counts
+    review_counts = np.minimum(review_counts, reviewers)
+    rng.shuffle(review_counts)
+
+    reviewer_weights = 1 / np.arange(1, reviewers + 1) ** zipf
+    reviewer_weights /= reviewer_weights.sum()
+
+    write_store_items(output_dir, rng, appids, review_counts, tagids)
+
+    recommendationid = 1
+    for appid, review_count in tqdm(zip(appids, review_counts), total=apps, desc="Generating Reviews"):
+        # one review per reviewer and app, like on steam
+        reviewer_indices = np.sort(rng.choice(reviewers, size=review_count, replace=False, p=reviewer_weights))
+        reviews = [make_review(rng, recommendationid + i, index) for i, index in enumerate(reviewer_indices)]
+        recommendationid += len(reviews)
+        with open(os.path.join(output_dir, "appreviews", f"{appid}.json"), "w", encoding="utf-8") as f:
+            json.dump(reviews, f)
+
+    print(f"Generated {apps} apps with {recommendationid - 1} reviews in {output_dir}.")
+
+
+def write_tags(output_dir, tag_count):
+    tagids = [int(tagid) for tagid in np.arange(1, tag_count + 1) * 7]
+    data = {"response": {"tags": [{"tagid": tagid, "name": f"Tag {tagid}"} for tagid in tagids]}}
+    with open(os.path.join(output_dir, "steam_tags.json"), "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    return tagids
+
+
+def write_store_items(output_dir, rng, appids, review_counts, tagids):
+    tag_weights = 1 / np.arange(1, len(tagids) + 1)
+    tag_weights /= tag_weights.sum()
+
+    for i in tqdm(range(0, len(appids), BATCH_SIZE), desc="Generating Apps"):
+        store_items = []
+        for appid, review_count in zip(appids[i:i+BATCH_SIZE], review_counts[i:i+BATCH_SIZE]):
+            app_tagids = rng.choice(tagids, size=min(rng.integers(3, 20), len(tagids)), replace=False, p=tag_weights)
+            release_date = datetime(2006, 1, 1).timestamp() + rng.integers(0, 20 * 365 * 24 * 3600)
+            store_items.append({
+                "appid": int(appid),
+                "name": f"Synthetic Game {appid}",
+                "reviews": {
+                    "summary_filtered": {
+                        "review_count": int(review_count),
+                        "percent_positive": int(rng.integers(20, 100)),
+                        "review_score": int(rng.integers(1, 10)),
+                    }
+                },
+                "release": {"steam_release_date": int(release_date)},
+                "tags": [{"tagid": int(t), "weight": int(1000 - 40 * rank)} for rank, t in enumerate(app_tagids)],
+                "basic_info": {
+                    "publishers": [{"name": f"Publisher {rng.integers(0, 500)}"}],
+                    "developers": [{"name": f"Developer {rng.integers(0, 1000)}"}],
+                },
+                "best_purchase_option": {"final_price_in_cents": int(rng.choice([0, 499, 999, 1499, 1999, 2999, 5999]))},
+            })
+
+        data = {"response": {"store_items": store_items}}
+        filepath = os.path.join(output_dir, "storebrowse_items", f"{store_items[0]['appid']}-{store_items[-1]['appid']}.json")
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+
+def make_review(rng, recommendationid, reviewer_index):
+    timestamp_created = int(datetime(2012, 1, 1).timestamp() + rng.integers(0, 13 * 365 * 24 * 3600))
+    playtime_forever = int(rng.exponential(1200))
+    return {
+        "recommendationid": str(recommendationid),
+        "author": {
+            "steamid": str(FIRST_STEAMID + int(reviewer_index)),
+            "num_games_owned": int(rng.exponential(150)),
+            "num_reviews": int(rng.exponential(10)) + 1,
+            "playtime_forever": playtime_forever,
+            "playtime_last_two_weeks": int(rng.integers(0, 600)),
+            "playtime_at_review": int(playtime_forever * rng.random()),
+            "last_played": timestamp_created + int(rng.integers(0, 10**7)),
+        },
+        "review": " ".join(rng.choice(WORDS, size=rng.integers(3, 80))),
+        "timestamp_created": timestamp_created,
+        "timestamp_updated": timestamp_created,
+        "voted_up": bool(rng.random() < 0.8),
+        "votes_up": int(rng.poisson(2)),
+        "votes_funny": int(rng.poisson(0.3)),
+        "weighted_vote_score": f"{rng.random():.6f}",
+        "comment_count": int(rng.poisson(0.2)),
+        "steam_purchase": bool(rng.random() < 0.9),
+        "received_for_free": bool(rng.random() < 0.05),
+        "written_during_early_access": bool(rng.random() < 0.1),
+        "primarily_steam_deck": bool(rng.random() < 0.05),
+    }
+
+
+if __name__ == "__main__":
+    main()
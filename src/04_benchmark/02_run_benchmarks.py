@@ -0,0 +1,152 @@
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import time
+from datetime import datetime
+
+import matplotlib
+
+from src import db_utility, exploration_utility, paths
+
+
+# Settings
+BENCHMARK_DB_NAME = "SteamAnalyticsBenchmark"
+BENCHMARK_OUTPUT_DIR = "output/benchmark"
+WRITE_STAGES = [
+    "src.02_write_db.02_write_tags",
+    "src.02_write_db.01_write_apps",
+    "src.02_write_db.03_write_reviews",
+    "src.02_write_db.04_write_app_shared_reviewers",
+    "src.02_write_db.08_write_tag_sketches",
+    "src.02_write_db.10_write_reviewer_index",
+]
+EXPLORATION_MODULES = [
+    "src.03_exploration.release_calmap",
+    "src.03_exploration.revenue_distribution",
+    "src.03_exploration.review_heatmap",
+    "src.03_exploration.review_histogram",
+    "src.03_exploration.review_timeseries",
+    "src.03_exploration.tag_revenue_percentiles",
+]
+TRUNCATE_SQL = """
+TRUNCATE apps, app_snapshots, tags, reviews, reviewers, app_shared_reviewers, review_daily_rollup, review_monthly_rollup, tag_sketches
+RESTART IDENTITY;
+DROP TABLE IF EXISTS app_shared_reviewers_stage;
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the write stages and plots against a local benchmark database.")
+    parser.add_argument("--data-dir", default=paths.SYNTHETIC_DATA_DIRECTORY, help="output of 01_generate_synthetic_data")
+    parser.add_argument("--db-name", default=BENCHMARK_DB_NAME, help="database with DB_scheme.sql applied, gets truncated!")
+    parser.add_argument("--skip-writes", action="store_true", help="only time the plots on the already loaded data")
+    args = parser.parse_args()
+
+    run_benchmarks(args.data_dir, args.db_name, args.skip_writes)
+
+
+def run_benchmarks(data_dir, db_name, skip_writes=False):
+    """
+    Load the synthetic dataset into `db_name` and time every stage and plot.
+
+    Results are appended to paths.BENCHMARK_RESULTS_PATH and compared to the previous run on the same dataset.
+    """
+    if db_name == "SteamAnalytics":
+        raise ValueError("Refusing to benchmark against the main database.")
+    os.environ["DB_NAME"] = db_name
+    os.environ["DB_BACKEND"] = "postgres"
+    matplotlib.use("Agg")
+
+    # point the stages at the synthetic data (they read paths.* when called)
+    paths.STOREBROWSE_ITEMS_DIRECTORY = os.path.join(data_dir, "storebrowse_items")
+    paths.REVIEWS_DIRECTORY = os.path.join(data_dir, "appreviews")
+    paths.TAGS_FILE = os.path.join(data_dir, "steam_tags.json")
+    paths.EXPLORATION_OUTPUT_DIR = BENCHMARK_OUTPUT_DIR
+    paths.SNAPSHOT_DIRECTORY = os.path.join(BENCHMARK_OUTPUT_DIR, "snapshots")
+    paths.REVIEWER_INDEX_DIRECTORY = os.path.join(BENCHMARK_OUTPUT_DIR, "reviewer_index")
+    os.makedirs(paths.SNAPSHOT_DIRECTORY, exist_ok=True)
+
+    timings = {}
+    if not skip_writes:
+        with db_utility.connect_to_db() as conn:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute(TRUNCATE_SQL)
+        for module_name in WRITE_STAGES:
+            timings[module_name.rsplit(".", 1)[-1]] = time_call(importlib.import_module(module_name).main)
+
+    exploration_utility.snapshot_files.clear()
+    for module_name in EXPLORATION_MODULES:
+        for function, filename, kwargs in importlib.import_module(module_name).FIGURES:
+            timings[filename] = time_call(function, filename, **kwargs)
+
+    result = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "commit": get_commit(),
+        "data_dir": data_dir,
+        "rows": count_rows(),
+        "seconds": timings,
+    }
+    report(result, load_previous_result(data_dir))
+    save_result(result)
+
+
+def time_call(function, *args, **kwargs):
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return round(time.perf_counter() - start, 3)
+
+
+def count_rows():
+    with db_utility.connect_to_db() as conn:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+SELECT
+    (SELECT COUNT(*) FROM apps),
+    (SELECT COUNT(*) FROM reviews),
+    (SELECT COUNT(*) FROM app_shared_reviewers);
+""")
+                apps, reviews, app_shared_reviewers = cur.fetchone()
+    return {"apps": apps, "reviews": reviews, "app_shared_reviewers": app_shared_reviewers}
+
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_previous_result(data_dir):
+    if not os.path.exists(paths.BENCHMARK_RESULTS_PATH):
+        return None
+    previous = None
+    with open(paths.BENCHMARK_RESULTS_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            result = json.loads(line)
+            if result["data_dir"] == data_dir:
+                previous = result
+    return previous
+
+
+def report(result, previous):
+    print(f"\nBenchmark ({result['rows']['apps']} apps, {result['rows']['reviews']} reviews):")
+    for name, seconds in result["seconds"].items():
+        line = f"  {name:<45} {seconds:>9.3f} s"
+        if previous is not None and name in previous["seconds"] and previous["seconds"][name] > 0:
+            change = seconds / previous["seconds"][name] - 1
+            line += f"  ({change:+.0%} vs {previous['commit']})"
+        print(line)
+
+
+def save_result(result):
+    os.makedirs(os.path.dirname(paths.BENCHMARK_RESULTS_PATH), exist_ok=True)
+    with open(paths.BENCHMARK_RESULTS_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
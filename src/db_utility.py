@@ -1,6 +1,7 @@
 import os
 from contextlib import contextmanager
 
+import pandas as pd
 import psycopg2
 from dotenv import load_dotenv
 
@@ -11,7 +12,7 @@ def connect_to_db():
     load_dotenv()
     try:
         conn = psycopg2.connect(
-            dbname="SteamAnalytics",
+            dbname=os.getenv("DB_NAME", "SteamAnalytics"),
             user=os.getenv("DB_USER"),
             password=os.getenv("DB_PASSWORD"),
             host="localhost",
@@ -23,7 +24,111 @@ def connect_to_db():
     except Exception as e:
         print(f"Failed to connect to DB.\n{e}")
         raise e
+
+
+def get_backend():
+    """
+    Backend for analytical reads, set with DB_BACKEND in .env.
+
+    - "postgres" (default): the local PostgreSQL instance
+    - "duckdb": embedded DuckDB over the Parquet files written by 07_write_parquet
+    """
+    load_dotenv()
+    return os.getenv("DB_BACKEND", "postgres").lower()
+
+
+def read_sql(sql, params=None):
+    """Run a read-only query on the configured backend and return a DataFrame."""
+    if get_backend() == "duckdb":
+        from src import duckdb_utility
+        return duckdb_utility.read_sql(sql, params)
+    with connect_to_db() as conn:
+        return pd.read_sql(sql, conn, params=params)
+
+
+def read_data_versions():
+    """Return {name: version} for all tracked tables of the configured backend."""
+    if get_backend() == "duckdb":
+        from src import duckdb_utility
+        return duckdb_utility.get_data_versions()
+    with connect_to_db() as conn:
+        return get_data_versions(conn)
+
+
+def refresh_apps_view(conn):
+    """
+    Refresh apps_materialized_view after apps or tags changed.
     
+    CONCURRENTLY keeps the view readable during the refresh (needs the unique index on appid).
+    """
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY apps_materialized_view;")
+    bump_data_version(conn, "apps_materialized_view")
+
+
+def bump_data_version(conn, name):
+    """Mark the data behind `name` as changed so cached snapshots of it get rebuilt."""
+    SQL = """
+INSERT INTO data_versions (name, version, updated_at)
+VALUES (%s, 1, now())
+ON CONFLICT (name) DO UPDATE
+SET
+    version = data_versions.version + 1,
+    updated_at = EXCLUDED.updated_at;
+"""
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(SQL, (name,))
+
+
+def get_data_versions(conn):
+    """Return {name: version} for all tracked tables."""
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT name, version FROM data_versions;")
+            return dict(cur.fetchall())
+
+
+def write_review_rollups(conn, recommendationids=None):
+    """
+    Add reviews to review_daily_rollup and review_monthly_rollup.
+
+    - recommendationids: only these (newly inserted) reviews; None adds all reviews
+    
+    Adds to existing rows, so every review must only be passed once.
+    """
+    SQL = """
+INSERT INTO {table} (appid, {period}, reviews, positive, early_access, steam_deck, playtime_at_review, playtime_forever)
+SELECT
+    appid,
+    date_trunc('{period}', timestamp_created)::date,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE voted_up),
+    COUNT(*) FILTER (WHERE written_during_early_access),
+    COUNT(*) FILTER (WHERE primarily_steam_deck),
+    COALESCE(SUM(playtime_at_review), 0),
+    COALESCE(SUM(playtime_forever), 0)
+FROM reviews
+WHERE timestamp_created IS NOT NULL
+{condition}
+GROUP BY 1, 2
+ON CONFLICT (appid, {period}) DO UPDATE
+SET
+    reviews = {table}.reviews + EXCLUDED.reviews,
+    positive = {table}.positive + EXCLUDED.positive,
+    early_access = {table}.early_access + EXCLUDED.early_access,
+    steam_deck = {table}.steam_deck + EXCLUDED.steam_deck,
+    playtime_at_review = {table}.playtime_at_review + EXCLUDED.playtime_at_review,
+    playtime_forever = {table}.playtime_forever + EXCLUDED.playtime_forever;
+"""
+    condition = "" if recommendationids is None else "AND recommendationid = ANY(%(recommendationids)s)"
+    with conn.cursor() as cur:
+        for table, period in (("review_daily_rollup", "day"), ("review_monthly_rollup", "month")):
+            cur.execute(
+                SQL.format(table=table, period=period, condition=condition),
+                {"recommendationids": list(recommendationids or [])})
+
 
 def assemble_list(items, composite=False):
     """
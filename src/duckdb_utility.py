@@ -0,0 +1,186 @@
+import glob
+import os
+import re
+
+import duckdb
+
+from src import paths
+
+
+# Parquet files written by 07_write_parquet, exposed as views with the same names as the PostgreSQL tables.
+TABLE_FILES = {
+    "apps": "apps.parquet",
+    "tags": "tags.parquet",
+    "reviews": "reviews/*.parquet",
+    "app_shared_reviewers": "app_shared_reviewers.parquet",
+}
+
+# DuckDB versions of the functions and views in DB_scheme.sql, so the exploration queries run unchanged.
+MACROS = """
+CREATE OR REPLACE MACRO tags_filter(tagids, whitelist, blacklist) AS
+    (whitelist IS NULL OR list_has_all(coalesce(list_transform(tagids, t -> t.tagid), []), whitelist))
+    AND (blacklist IS NULL OR NOT list_has_any(coalesce(list_transform(tagids, t -> t.tagid), []), blacklist));
+
+CREATE OR REPLACE MACRO width_bucket(x, low, high, count) AS
+    CASE
+        WHEN x < low THEN 0
+        WHEN x >= high THEN count + 1
+        ELSE floor((x - low) / (high - low) * count)::INT + 1
+    END;
+"""
+
+VIEWS = {
+    "apps": """
+CREATE OR REPLACE VIEW apps_view AS
+SELECT
+    a.*,
+    a.price * a.reviews.total_reviews * 24.5 AS revenue_estimate,
+    n.tagnames
+FROM apps a
+LEFT JOIN (
+    SELECT
+        w.appid,
+        list({'tagname': t.tagname, 'weight': w.wt.weight}) AS tagnames
+    FROM (SELECT appid, unnest(tagids) AS wt FROM apps) w
+    JOIN tags t ON t.tagid = w.wt.tagid
+    GROUP BY w.appid
+) n ON n.appid = a.appid;
+
+-- nothing to materialize, DuckDB computes the view fast enough
+CREATE OR REPLACE VIEW apps_materialized_view AS
+SELECT * FROM apps_view;
+""",
+    "reviews": """
+CREATE OR REPLACE VIEW review_daily_rollup AS
+SELECT
+    appid,
+    date_trunc('day', timestamp_created)::date AS day,
+    COUNT(*) AS reviews,
+    COUNT(*) FILTER (WHERE voted_up) AS positive,
+    COUNT(*) FILTER (WHERE written_during_early_access) AS early_access,
+    COUNT(*) FILTER (WHERE primarily_steam_deck) AS steam_deck,
+    COALESCE(SUM(author.playtime_at_review), 0) AS playtime_at_review,
+    COALESCE(SUM(author.playtime_forever), 0) AS playtime_forever
+FROM reviews
+WHERE timestamp_created IS NOT NULL
+GROUP BY 1, 2;
+
+CREATE OR REPLACE VIEW review_monthly_rollup AS
+SELECT
+    appid,
+    date_trunc('month', day)::date AS month,
+    SUM(reviews) AS reviews,
+    SUM(positive) AS positive,
+    SUM(early_access) AS early_access,
+    SUM(steam_deck) AS steam_deck,
+    SUM(playtime_at_review) AS playtime_at_review,
+    SUM(playtime_forever) AS playtime_forever
+FROM review_daily_rollup
+GROUP BY 1, 2;
+""",
+    "app_shared_reviewers": """
+CREATE OR REPLACE VIEW app_shared_reviewers_view AS
+SELECT
+    a.*,
+    a.shared_reviewers::float / (a.reviews1 + a.reviews2 - a.shared_reviewers)::float AS jaccard,
+    2.0 * a.shared_reviewers::float / (a.reviews1 + a.reviews2)::float AS dice,
+    a.shared_reviewers::float / LEAST(a.reviews1, a.reviews2)::float AS overlap,
+    a.shared_reviewers::float / NULLIF(sqrt(a.reviews1::float * a.reviews2::float), 0) AS cosine
+FROM app_shared_reviewers a;
+""",
+}
+
+# Same pair counting as 04_write_app_shared_reviewers.
+APP_SHARED_REVIEWERS_SQL = """
+WITH a AS (
+    SELECT DISTINCT
+        author.steamid AS steamid,
+        appid
+    FROM reviews
+),
+rc AS (
+    SELECT appid, COUNT(*) AS review_count
+    FROM reviews
+    GROUP BY appid
+)
+SELECT
+    LEAST(a1.appid, a2.appid)    AS appid1,
+    GREATEST(a1.appid, a2.appid) AS appid2,
+    rc1.review_count             AS reviews1,
+    rc2.review_count             AS reviews2,
+    COUNT(*)                     AS shared_reviewers
+FROM a a1
+JOIN a a2
+  ON a1.steamid = a2.steamid
+ AND a1.appid < a2.appid
+JOIN rc rc1 ON rc1.appid = LEAST(a1.appid, a2.appid)
+JOIN rc rc2 ON rc2.appid = GREATEST(a1.appid, a2.appid)
+GROUP BY appid1, appid2, reviews1, reviews2
+"""
+
+
+# globals
+connection = None
+
+
+def connect_to_duckdb():
+    """
+    Return the process wide in-memory DuckDB connection, with views over the Parquet files.
+
+    Views are only created for files that exist, so e.g. the apps plots work without any reviews converted.
+    """
+    global connection
+    if connection is not None:
+        return connection
+
+    connection = duckdb.connect()
+    connection.execute(MACROS)
+    for table, filename in TABLE_FILES.items():
+        if not glob.glob(os.path.join(paths.PARQUET_DIRECTORY, filename)):
+            continue
+        connection.execute(f"""
+CREATE OR REPLACE VIEW {table} AS
+SELECT * FROM read_parquet('{paths.PARQUET_DIRECTORY}/{filename}');
+""")
+    for table, sql in VIEWS.items():
+        if table in get_tables():
+            connection.execute(sql)
+    return connection
+
+
+def get_tables():
+    rows = connection.execute("SELECT view_name FROM duckdb_views() WHERE NOT internal;").fetchall()
+    return {row[0] for row in rows}
+
+
+def read_sql(sql, params=None):
+    """
+    Run a query written for PostgreSQL/psycopg2 on DuckDB.
+
+    Placeholders are translated: %(name)s -> $name and %s -> ?.
+    """
+    sql = re.sub(r"%\((\w+)\)s", r"$\1", sql)
+    sql = sql.replace("%s", "?")
+    return connect_to_duckdb().execute(sql, params).df()
+
+
+def get_data_versions():
+    """
+    Versions for the snapshot cache, derived from the modification times of the Parquet files.
+
+    Tables without files are left out, so callers can tell which tables this backend has.
+    """
+    versions = {}
+    for table, filename in TABLE_FILES.items():
+        files = glob.glob(os.path.join(paths.PARQUET_DIRECTORY, filename))
+        if files:
+            versions[table] = max(os.stat(f).st_mtime_ns for f in files)
+    if "apps" in versions and "tags" in versions:
+        versions["apps_materialized_view"] = max(versions["apps"], versions["tags"])
+    return versions
+
+
+def write_app_shared_reviewers():
+    """Count shared reviewers for every app pair and write them to app_shared_reviewers.parquet."""
+    filepath = os.path.join(paths.PARQUET_DIRECTORY, TABLE_FILES["app_shared_reviewers"])
+    connect_to_duckdb().execute(f"COPY ({APP_SHARED_REVIEWERS_SQL}) TO '{filepath}' (FORMAT parquet);")
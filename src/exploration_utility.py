@@ -1,4 +1,53 @@
-from src import paths
+import glob
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src import db_utility, paths
+
+
+# Local Parquet snapshots of the tables the plots read.
+# Each snapshot is keyed by the data_versions entry of its source, so a write to the DB invalidates it.
+SNAPSHOTS = {
+    "apps": {
+        "source": "apps_materialized_view",
+        "sql": """
+SELECT
+    appid,
+    name,
+    (reviews).total_reviews AS total_reviews,
+    (reviews).percent_positive AS percent_positive,
+    (reviews).review_score AS review_score,
+    release_date,
+    price::float8 AS price,
+    revenue_estimate::float8 AS revenue_estimate,
+    ARRAY(SELECT t.tagid FROM unnest(tagids) AS t) AS tagids
+FROM apps_materialized_view;
+""",
+        "duckdb_sql": """
+SELECT
+    appid,
+    name,
+    reviews.total_reviews AS total_reviews,
+    reviews.percent_positive AS percent_positive,
+    reviews.review_score AS review_score,
+    release_date,
+    price::float8 AS price,
+    revenue_estimate::float8 AS revenue_estimate,
+    coalesce(list_transform(tagids, t -> t.tagid), []) AS tagids
+FROM apps_materialized_view;
+""",
+    },
+}
+
+
+# Fixed seed, so repeated previews of the same figure read the same sample.
+PREVIEW_SEED = 42
+
+
+# globals
+snapshot_files = {}
 
 
 def get_full_filename(filename):
@@ -12,3 +61,94 @@ def combine_lines(*lines):
 
 def remap(value, in_min_max, out_min_max):
     return out_min_max[0] + (value - in_min_max[0]) * (out_min_max[1] - out_min_max[0]) / (in_min_max[1] - in_min_max[0])
+
+
+def get_sample_clause(preview, method="SYSTEM"):
+    """
+    TABLESAMPLE clause that reads about `preview` (fraction, 0..1] of a table, "" for the full table.
+
+    - SYSTEM: whole pages, only the sampled pages are read (fastest, rows of a page are correlated)
+    - BERNOULLI: single rows, still reads every page
+    Counts from a sample have to be multiplied by get_preview_scale(preview).
+    """
+    if not preview:
+        return ""
+    if not 0 < preview <= 1:
+        raise ValueError("preview must be a fraction between 0 and 1")
+    if db_utility.get_backend() == "duckdb":
+        return f"TABLESAMPLE {method} ({preview * 100}%) REPEATABLE ({PREVIEW_SEED})"
+    return f"TABLESAMPLE {method} ({preview * 100}) REPEATABLE ({PREVIEW_SEED})"
+
+
+def get_preview_scale(preview):
+    return 1 / preview if preview else 1
+
+
+def update_snapshots():
+    """
+    Make sure every snapshot in SNAPSHOTS is current.
+
+    Checks data_versions once and only re-reads tables whose version changed.
+    Returns {snapshot name: parquet file}.
+    """
+    os.makedirs(paths.SNAPSHOT_DIRECTORY, exist_ok=True)
+    backend = db_utility.get_backend()
+    versions = db_utility.read_data_versions()
+    for name, snapshot in SNAPSHOTS.items():
+        version = versions.get(snapshot["source"], 0)
+        filepath = os.path.join(paths.SNAPSHOT_DIRECTORY, f"{name}_{backend}_v{version}.parquet")
+        if not os.path.exists(filepath):
+            sql = snapshot.get(f"{backend}_sql", snapshot["sql"])
+            write_snapshot(sql, filepath)
+            remove_stale_snapshots(name, filepath)
+        snapshot_files[name] = filepath
+    return dict(snapshot_files)
+
+
+def write_snapshot(sql, filepath):
+    df = db_utility.read_sql(sql)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # write to a temp file first, so a crashed run never leaves a half-written snapshot behind
+    temp_filepath = f"{filepath}.tmp"
+    pq.write_table(table, temp_filepath)
+    os.replace(temp_filepath, filepath)
+
+
+def remove_stale_snapshots(name, current_filepath):
+    for filepath in glob.glob(os.path.join(paths.SNAPSHOT_DIRECTORY, f"{name}_*.parquet")):
+        if os.path.normpath(filepath) != os.path.normpath(current_filepath):
+            os.remove(filepath)
+
+
+def read_snapshot(name, columns=None, filters=None):
+    """
+    Read a snapshot as DataFrame.
+
+    - columns: only these columns are read from the file
+    - filters: pyarrow predicates, e.g. [("price", ">", 0)], applied while reading
+
+    The version check against the DB runs once per process, later calls only read the local file.
+    The file is memory-mapped, but to_pandas still copies the selected columns (list columns like tagids
+    become Python lists), so only request the columns a plot needs.
+    """
+    if name not in snapshot_files:
+        update_snapshots()
+    table = pq.read_table(snapshot_files[name], columns=columns, filters=filters, memory_map=True)
+    return table.to_pandas()
+
+
+def tags_filter(tagids, whitelist=None, blacklist=None):
+    """
+    Boolean mask over a Series of tagid lists, same semantics as the tags_filter SQL function.
+
+    - whitelist: ALL of these tags must be present
+    - blacklist: NONE of these tags may be present
+    """
+    whitelist = set(whitelist or [])
+    blacklist = set(blacklist or [])
+
+    def matches(ids):
+        ids = set(ids)
+        return whitelist <= ids and not (blacklist & ids)
+
+    return tagids.map(matches).astype(bool)
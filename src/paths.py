@@ -3,5 +3,12 @@ TAG_LIST_PATH = "data/tags.json"
 APPDETAILS_DIRECTORY = "data/appdetails"
 STOREBROWSE_ITEMS_DIRECTORY = "data/storebrowse_items"
 REVIEWS_DIRECTORY = "data/appreviews"
-TAGS_FILE = "data/steam_tags.json"
+TAGS_FILE = TAG_LIST_PATH  # written by 02_download_tag_list, read by 02_write_tags
+SNAPSHOT_DIRECTORY = "data/snapshots"
+PARQUET_DIRECTORY = "data/parquet"
+REVIEWER_INDEX_DIRECTORY = "data/reviewer_index"
+SYNTHETIC_DATA_DIRECTORY = "data/synthetic"
+BENCHMARK_RESULTS_PATH = "output/benchmarks.jsonl"
+METRICS_DIRECTORY = "output/metrics"
+PIPELINE_STATE_PATH = "data/pipeline_state.json"
 EXPLORATION_OUTPUT_DIR = "output"
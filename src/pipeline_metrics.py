@@ -0,0 +1,163 @@
+import cProfile
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from src import paths
+
+
+# Settings
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf)
+FLUSH_INTERVAL = 60  # seconds, long runs write intermediate results
+
+
+# globals
+lock = threading.Lock()
+counters = {}
+histograms = {}
+current_stage = None
+stage_start = None
+last_flush = None
+
+
+@contextmanager
+def stage(name):
+    """
+    Collect metrics for one pipeline stage (one script).
+
+    Writes the results on exit and every FLUSH_INTERVAL seconds to
+    - paths.METRICS_DIRECTORY/metrics.jsonl: one JSON summary per flush
+    - paths.METRICS_DIRECTORY/<stage>.prom: Prometheus text format, latest state
+    With PIPELINE_PROFILE=1 in .env the stage also runs under cProfile (<stage>.pstats).
+    cProfile only follows the thread that entered the stage: for stages doing their work in
+    executor threads (the downloaders) the profile mostly shows the main thread waiting,
+    use the request and file metrics for those.
+    """
+    global current_stage, stage_start, last_flush
+    load_dotenv()
+    os.makedirs(paths.METRICS_DIRECTORY, exist_ok=True)
+    with lock:
+        counters.clear()
+        histograms.clear()
+        current_stage = name
+        stage_start = last_flush = time.perf_counter()
+
+    profiler = cProfile.Profile() if os.getenv("PIPELINE_PROFILE") == "1" else None
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(paths.METRICS_DIRECTORY, f"{name}.pstats"))
+        flush(final=True)
+        current_stage = None
+
+
+def count(name, value=1, **labels):
+    """Add `value` to a counter, e.g. count("rows_written_total", table="apps")."""
+    key = (name, tuple(sorted(labels.items())))
+    with lock:
+        counters[key] = counters.get(key, 0) + value
+    maybe_flush()
+
+
+def observe(name, seconds, **labels):
+    """Add one observation to a latency histogram (buckets are cumulative, like in Prometheus)."""
+    key = (name, tuple(sorted(labels.items())))
+    with lock:
+        histogram = histograms.setdefault(key, {"count": 0, "sum": 0.0, "buckets": [0] * len(LATENCY_BUCKETS)})
+        histogram["count"] += 1
+        histogram["sum"] += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][i] += 1
+    maybe_flush()
+
+
+@contextmanager
+def timed(name, **labels):
+    """Observe the duration of the with block in histogram `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def record_request(endpoint, latency, response=None, error=None):
+    """Record one HTTP request: latency, status code (or error type) and response size."""
+    if response is not None:
+        status = str(response.status_code)
+        count("response_bytes_total", len(response.content), endpoint=endpoint)
+    else:
+        status = type(error).__name__ if error is not None else "unknown"
+    count("requests_total", endpoint=endpoint, status=status)
+    observe("request_latency_seconds", latency, endpoint=endpoint)
+
+
+def record_file_written(filepath):
+    count("files_written_total")
+    count("bytes_written_total", os.path.getsize(filepath))
+
+
+def maybe_flush():
+    if current_stage is not None and time.perf_counter() - last_flush >= FLUSH_INTERVAL:
+        flush()
+
+
+def flush(final=False):
+    global last_flush
+    with lock:
+        if current_stage is None:
+            return
+        last_flush = time.perf_counter()
+        elapsed = last_flush - stage_start
+        summary = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "stage": current_stage,
+            "final": final,
+            "elapsed_seconds": round(elapsed, 3),
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value, "per_second": round(value / elapsed, 3) if elapsed else None}
+                for (name, labels), value in counters.items()
+            ],
+            "histograms": [
+                # bounds as strings, inf is not valid JSON
+                {"name": name, "labels": dict(labels), "bounds": [str(b) for b in LATENCY_BUCKETS], **histogram}
+                for (name, labels), histogram in histograms.items()
+            ],
+        }
+        summary_line = json.dumps(summary)
+        prometheus_text = to_prometheus_text()
+
+    with open(os.path.join(paths.METRICS_DIRECTORY, "metrics.jsonl"), "a", encoding="utf-8") as f:
+        f.write(summary_line + "\n")
+    with open(os.path.join(paths.METRICS_DIRECTORY, f"{summary['stage']}.prom"), "w", encoding="utf-8") as f:
+        f.write(prometheus_text)
+
+
+def to_prometheus_text():
+    """Current metrics in the Prometheus text exposition format."""
+    lines = []
+    for (name, labels), value in sorted(counters.items()):
+        lines.append(f"steamanalytics_{name}{format_labels(labels)} {value}")
+    for (name, labels), histogram in sorted(histograms.items()):
+        for bound, bucket_count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+            le = "+Inf" if bound == math.inf else str(bound)
+            lines.append(f"steamanalytics_{name}_bucket{format_labels(labels + (('le', le),))} {bucket_count}")
+        lines.append(f"steamanalytics_{name}_sum{format_labels(labels)} {histogram['sum']}")
+        lines.append(f"steamanalytics_{name}_count{format_labels(labels)} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    labels = (("stage", current_stage),) + tuple(labels)
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
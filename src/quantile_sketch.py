@@ -0,0 +1,156 @@
+import numpy as np
+
+from src import db_utility
+
+
+# Settings
+COMPRESSION = 200
+ALL_APPS_TAGID = 0  # tag_sketches row that covers all apps
+METRICS = ("revenue_estimate", "price", "total_reviews")
+
+
+class TDigest:
+    """
+    Mergeable quantile sketch (merging t-digest with the k1 scale function).
+
+    Keeps at most ~COMPRESSION centroids, small ones at the tails, so extreme percentiles stay accurate.
+    Merging two digests gives the digest of the union of both inputs.
+    """
+
+    def __init__(self, means, weights, minimum, maximum, compression=COMPRESSION):
+        self.means = np.asarray(means, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.compression = compression
+
+    @classmethod
+    def from_values(cls, values, compression=COMPRESSION):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return cls([], [], None, None, compression)
+        means, weights = compress(values, np.ones(len(values)), compression)
+        return cls(means, weights, values.min(), values.max(), compression)
+
+    @property
+    def count(self):
+        return self.weights.sum()
+
+    def merge(self, *others):
+        digests = [d for d in (self, *others) if d.count > 0]
+        if not digests:
+            return TDigest([], [], None, None, self.compression)
+        means, weights = compress(
+            np.concatenate([d.means for d in digests]),
+            np.concatenate([d.weights for d in digests]),
+            self.compression)
+        return TDigest(
+            means,
+            weights,
+            min(d.minimum for d in digests),
+            max(d.maximum for d in digests),
+            self.compression)
+
+    def quantile(self, q):
+        """Values at quantiles q (scalar or array, 0..1)."""
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan)
+        # centroid means sit at the middle of their weight, min/max at the ends
+        positions = np.concatenate([[0], np.cumsum(self.weights) - self.weights / 2, [self.count]])
+        values = np.concatenate([[self.minimum], self.means, [self.maximum]])
+        return np.interp(np.asarray(q) * self.count, positions, values)
+
+
+def compress(means, weights, compression):
+    """
+    Merge neighbouring centroids so that each one covers at most 1 unit of the k1 scale,
+    k(q) = compression / (2 pi) * asin(2q - 1).
+    """
+    order = np.argsort(means, kind="stable")
+    means, weights = means[order], weights[order]
+    total = weights.sum()
+    q = (np.cumsum(weights) - weights / 2) / total
+    k = compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+    groups = np.floor(k - k[0]).astype(int)
+    group_weights = np.bincount(groups, weights=weights)
+    group_means = np.bincount(groups, weights=means * weights) / np.where(group_weights > 0, group_weights, 1)
+    used = group_weights > 0
+    return group_means[used], group_weights[used]
+
+
+def write_tag_sketches(conn):
+    """Rebuild tag_sketches from apps_materialized_view: one digest per tag and metric, plus one for all apps."""
+    SQL = """
+SELECT
+    revenue_estimate::float8 AS revenue_estimate,
+    price::float8 AS price,
+    (reviews).total_reviews::float8 AS total_reviews,
+    ARRAY(SELECT t.tagid FROM unnest(tagids) AS t) AS tagids
+FROM apps_materialized_view;
+"""
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(SQL)
+            rows = cur.fetchall()
+
+    apps = {metric: np.array([row[i] if row[i] is not None else np.nan for row in rows]) for i, metric in enumerate(METRICS)}
+    # same population as revenue_distribution: only apps with a price
+    apps["revenue_estimate"][~(apps["price"] > 0)] = np.nan
+
+    app_indices = {ALL_APPS_TAGID: np.arange(len(rows))}
+    for i, row in enumerate(rows):
+        for tagid in row[3]:
+            app_indices.setdefault(tagid, []).append(i)
+
+    INSERT_SQL = """
+INSERT INTO tag_sketches (tagid, metric, compression, count, min, max, means, weights)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+"""
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE tag_sketches;")
+            for tagid, indices in app_indices.items():
+                indices = np.asarray(indices)
+                for metric in METRICS:
+                    digest = TDigest.from_values(apps[metric][indices])
+                    cur.execute(INSERT_SQL, (
+                        tagid,
+                        metric,
+                        digest.compression,
+                        int(digest.count),
+                        digest.minimum,
+                        digest.maximum,
+                        digest.means.tolist(),
+                        digest.weights.tolist(),
+                    ))
+
+
+def read_sketches(metric, tagids=None):
+    """{tagid: TDigest} for `metric`, all tags if tagids is None."""
+    if db_utility.get_backend() == "duckdb":
+        raise ValueError("tag_sketches are only written to PostgreSQL, use DB_BACKEND=postgres")
+    SQL = """
+SELECT tagid, compression, min, max, means, weights
+FROM tag_sketches
+WHERE metric = %(metric)s
+AND (%(tagids)s::int[] IS NULL OR tagid IN (SELECT unnest(%(tagids)s::int[])));
+"""
+    df = db_utility.read_sql(SQL, {"metric": metric, "tagids": list(tagids) if tagids is not None else None})
+    return {
+        row.tagid: TDigest(row.means or [], row.weights or [], row.min, row.max, row.compression)
+        for row in df.itertuples()
+    }
+
+
+def read_merged_sketch(metric, tagids=None):
+    """
+    Digest of `metric` over all apps that have ANY of `tagids` (all apps if None).
+
+    Apps with several of the tags are counted once per tag, merging can't deduplicate them.
+    """
+    sketches = read_sketches(metric, [ALL_APPS_TAGID] if not tagids else tagids)
+    if not sketches:
+        return TDigest([], [], None, None)
+    first, *others = sketches.values()
+    return first.merge(*others)
@@ -0,0 +1,167 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from src import pipeline_metrics
+
+
+# globals
+controllers = {}
+controllers_lock = threading.Lock()
+
+
+def get_controller(endpoint, **settings):
+    """Shared AdaptiveController per endpoint, created with `settings` on first use."""
+    with controllers_lock:
+        if endpoint not in controllers:
+            controllers[endpoint] = AdaptiveController(endpoint, **settings)
+        return controllers[endpoint]
+
+
+class AdaptiveController:
+    """
+    Limits concurrent requests to one endpoint and adapts the limit AIMD style:
+
+    - every successful request raises the limit by 1/limit (about +1 per round of requests)
+    - 429, 5xx, timeouts and connection errors halve it (at most once per average latency)
+    - failed requests are retried after a jittered exponential backoff, or after Retry-After if given;
+      a 429 pauses the whole endpoint for that time
+
+    The request timeout follows the measured latency (average + 4 * deviation, like TCP's RTO).
+    """
+
+    def __init__(self,
+                 endpoint,
+                 initial_limit=4,
+                 min_limit=1,
+                 max_limit=16,
+                 max_attempts=5,
+                 min_timeout=2,
+                 max_timeout=30,
+                 base_backoff=1,
+                 max_backoff=120):
+        self.endpoint = endpoint
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_attempts = max_attempts
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.latency_average = None
+        self.latency_deviation = 0.0
+
+    def get(self, url, stop_event=None, **kwargs):
+        """
+        requests.get with concurrency limit and retries.
+
+        Returns the first successful response. Raises the last error once max_attempts are used up,
+        and InterruptedError if stop_event gets set while waiting.
+        4xx errors other than 429 are treated as permanent and raised on the first attempt, without retries.
+        """
+        timeout = kwargs.pop("timeout", None)
+        for attempt in range(1, self.max_attempts + 1):
+            self.acquire(stop_event)
+            start = time.perf_counter()
+            response = error = None
+            try:
+                response = requests.get(url, timeout=timeout or self.get_timeout(), **kwargs)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                error = e
+            finally:
+                latency = time.perf_counter() - start
+                self.release()
+            pipeline_metrics.record_request(self.endpoint, latency, response, error)
+
+            if error is None and response.status_code != 429 and response.status_code < 500:
+                response.raise_for_status()
+                self.on_success(latency)
+                return response
+
+            self.on_congestion()
+            if attempt == self.max_attempts:
+                break
+            delay = self.get_retry_after(response) if response is not None else None
+            if delay is not None and response.status_code == 429:
+                pipeline_metrics.count("throttled_total", endpoint=self.endpoint)
+                with self.condition:
+                    self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            if delay is None:
+                # full jitter
+                delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1)))
+            pipeline_metrics.count("retries_total", endpoint=self.endpoint)
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    raise InterruptedError("Stop requested.")
+            else:
+                time.sleep(delay)
+
+        if error is not None:
+            raise error
+        response.raise_for_status()
+
+    def acquire(self, stop_event=None):
+        with self.condition:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    raise InterruptedError("Stop requested.")
+                pause = self.paused_until - time.monotonic()
+                if pause <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self.condition.wait(timeout=min(max(pause, 0.1), 1))
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def on_success(self, latency):
+        with self.condition:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            if self.latency_average is None:
+                self.latency_average = latency
+                self.latency_deviation = latency / 2
+            else:
+                self.latency_deviation = 0.75 * self.latency_deviation + 0.25 * abs(latency - self.latency_average)
+                self.latency_average = 0.875 * self.latency_average + 0.125 * latency
+            self.condition.notify_all()
+
+    def on_congestion(self):
+        with self.condition:
+            now = time.monotonic()
+            # requests that were already in flight report the same congestion, only react once
+            if now - self.last_decrease < (self.latency_average or 1):
+                return
+            self.last_decrease = now
+            self.limit = max(self.min_limit, self.limit / 2)
+
+    def get_timeout(self):
+        if self.latency_average is None:
+            return self.max_timeout
+        timeout = self.latency_average + 4 * self.latency_deviation
+        return min(self.max_timeout, max(self.min_timeout, timeout))
+
+    @staticmethod
+    def get_retry_after(response):
+        """Seconds from a Retry-After header (delta seconds or HTTP date), None if missing."""
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,94 @@
+import pandas as pd
+
+from src import db_utility
+
+
+# Must match the text search config used by the reviews_tsv_update trigger.
+SEARCH_CONFIG = "english"
+
+
+def search_reviews(query, appids=None, since=None, until=None, limit=100):
+    """
+    Full-text search over review text, best matches first.
+
+    - query: web search syntax, e.g. 'performance or crash', '"frame drops" -multiplayer'
+    - appids: only reviews of these apps
+    - since / until: only reviews created in [since, until)
+    """
+    where, params = build_filter(query, appids, since, until)
+    # headlines are expensive, so they are only built for the rows that survive the LIMIT
+    SQL = f"""
+WITH hits AS (
+    SELECT
+        r.recommendationid,
+        r.appid,
+        r.timestamp_created,
+        r.voted_up,
+        r.review,
+        q.query,
+        ts_rank_cd(r.review_tsv, q.query) AS rank
+    FROM reviews r, websearch_to_tsquery(%(config)s, %(query)s) AS q(query)
+    WHERE {where}
+    ORDER BY rank DESC
+    LIMIT %(limit)s
+)
+SELECT
+    recommendationid,
+    appid,
+    timestamp_created,
+    voted_up,
+    rank,
+    ts_headline(%(config)s, review, query) AS headline
+FROM hits
+ORDER BY rank DESC;
+"""
+    params["limit"] = limit
+    with db_utility.connect_to_db() as conn:
+        return pd.read_sql(SQL, conn, params=params)
+
+
+def count_hits_per_app(query, appids=None, since=None, until=None):
+    """Number of matching reviews per app, most hits first."""
+    where, params = build_filter(query, appids, since, until)
+    SQL = f"""
+SELECT
+    r.appid,
+    COUNT(*) AS hits
+FROM reviews r, websearch_to_tsquery(%(config)s, %(query)s) AS q(query)
+WHERE {where}
+GROUP BY r.appid
+ORDER BY hits DESC;
+"""
+    with db_utility.connect_to_db() as conn:
+        return pd.read_sql(SQL, conn, params=params)
+
+
+def count_hits_per_month(query, appids=None, since=None, until=None):
+    """Number of matching reviews per month of review creation."""
+    where, params = build_filter(query, appids, since, until)
+    SQL = f"""
+SELECT
+    date_trunc('month', r.timestamp_created) AS month,
+    COUNT(*) AS hits
+FROM reviews r, websearch_to_tsquery(%(config)s, %(query)s) AS q(query)
+WHERE {where}
+GROUP BY month
+ORDER BY month;
+"""
+    with db_utility.connect_to_db() as conn:
+        return pd.read_sql(SQL, conn, params=params)
+
+
+def build_filter(query, appids=None, since=None, until=None):
+    conditions = ["r.review_tsv @@ q.query"]
+    params = {"config": SEARCH_CONFIG, "query": query}
+    if appids is not None:
+        conditions.append("r.appid = ANY(%(appids)s)")
+        params["appids"] = list(appids)
+    if since is not None:
+        conditions.append("r.timestamp_created >= %(since)s")
+        params["since"] = since
+    if until is not None:
+        conditions.append("r.timestamp_created < %(until)s")
+        params["until"] = until
+    return "\n    AND ".join(conditions), params
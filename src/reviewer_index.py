@@ -0,0 +1,176 @@
+import json
+import os
+
+import numpy as np
+
+from src import paths
+
+
+# Settings
+FETCH_SIZE = 1_000_000  # pairs per round trip while building
+
+# Both directions as CSR over the raw ids: the neighbours of row i are indices[indptr[i]:indptr[i + 1]], sorted.
+# indptr is a .npy file, indices a raw int32 file (written in chunks, its length is only known at the end).
+DIRECTIONS = {
+    "app_reviewers": {
+        "row": "appid",
+        "column": "reviewerid",
+        "max_sql": "SELECT COALESCE(MAX(appid), 0) FROM reviews;",
+    },
+    "reviewer_apps": {
+        "row": "reviewerid",
+        "column": "appid",
+        "max_sql": "SELECT COALESCE(MAX(reviewerid), 0) FROM reviewers;",
+    },
+}
+
+
+def write_reviewer_index(conn, directory=None):
+    """
+    Export the distinct (reviewerid, appid) pairs of the reviews table as two CSR indexes,
+    app -> reviewers and reviewer -> apps, plus num_games_owned per reviewerid.
+
+    Pairs are streamed with a server side cursor, so neither side needs the whole table in memory.
+    Everything is read in one REPEATABLE READ transaction, so concurrent loads can't make
+    the two directions (or the max ids the arrays are sized by) disagree.
+    Rows are the raw ids, 03_write_reviews keeps reviewerid dense.
+    """
+    directory = directory or paths.REVIEWER_INDEX_DIRECTORY
+    os.makedirs(directory, exist_ok=True)
+
+    with conn:
+        with conn.cursor() as cur:
+            # must be the first statement of the transaction
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY;")
+        meta = {name: write_csr(conn, name, direction, directory) for name, direction in DIRECTIONS.items()}
+
+        with conn.cursor() as cur:
+            cur.execute(DIRECTIONS["reviewer_apps"]["max_sql"])
+            max_reviewerid = cur.fetchone()[0]
+            cur.execute("SELECT reviewerid, num_games_owned FROM reviewers WHERE num_games_owned IS NOT NULL;")
+            rows = np.array(cur.fetchall(), dtype=np.int64).reshape(-1, 2)
+    num_games_owned = np.full(max_reviewerid + 1, -1, dtype=np.int32)  # -1: unknown
+    num_games_owned[rows[:, 0]] = rows[:, 1]
+    save_npy(os.path.join(directory, "num_games_owned.npy"), num_games_owned)
+
+    # written last, readers only trust files listed here
+    replace_file(os.path.join(directory, "meta.json"), json.dumps(meta, indent=2).encode())
+
+
+def write_csr(conn, name, direction, directory):
+    """Write one direction, runs inside the caller's transaction."""
+    with conn.cursor() as cur:
+        cur.execute(direction["max_sql"])
+        max_row = cur.fetchone()[0]
+
+    SQL = f"""
+SELECT {direction["row"]}, {direction["column"]}
+FROM reviews
+WHERE reviewerid IS NOT NULL
+GROUP BY {direction["row"]}, {direction["column"]}
+ORDER BY {direction["row"]}, {direction["column"]};
+"""
+    counts = np.zeros(max_row + 1, dtype=np.int64)
+    indices_path = os.path.join(directory, f"{name}.indices")
+    with conn.cursor(name=f"{name}_pairs") as cur, open(indices_path + ".tmp", "wb") as f:
+        cur.itersize = FETCH_SIZE
+        cur.execute(SQL)
+        while True:
+            chunk = cur.fetchmany(FETCH_SIZE)
+            if not chunk:
+                break
+            pairs = np.array(chunk, dtype=np.int64)
+            rows, row_counts = np.unique(pairs[:, 0], return_counts=True)
+            counts[rows] += row_counts
+            f.write(pairs[:, 1].astype(np.int32).tobytes())
+    os.replace(indices_path + ".tmp", indices_path)
+
+    indptr = np.concatenate([[0], np.cumsum(counts)])
+    save_npy(os.path.join(directory, f"{name}.indptr.npy"), indptr)
+    return {"rows": int(max_row + 1), "pairs": int(indptr[-1])}
+
+
+def save_npy(path, array):
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, array)
+    os.replace(path + ".tmp", path)
+
+
+def replace_file(path, content):
+    with open(path + ".tmp", "wb") as f:
+        f.write(content)
+    os.replace(path + ".tmp", path)
+
+
+class ReviewerIndex:
+    """
+    Read-only, memory-mapped view of the index written by write_reviewer_index.
+
+    Only the pages a query touches are read from disk, so opening is instant
+    and several processes share the same page cache.
+    """
+
+    def __init__(self, directory=None):
+        directory = directory or paths.REVIEWER_INDEX_DIRECTORY
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.csr = {name: load_csr(directory, name, meta[name]) for name in DIRECTIONS}
+        self.num_games_owned = np.load(os.path.join(directory, "num_games_owned.npy"), mmap_mode="r")
+
+    def reviewers_of(self, appid):
+        """Sorted reviewerids of an app."""
+        return get_row(*self.csr["app_reviewers"], appid)
+
+    def apps_of(self, reviewerid):
+        """Sorted appids a reviewer has reviewed."""
+        return get_row(*self.csr["reviewer_apps"], reviewerid)
+
+    def shared_reviewers(self, appid, other_appid):
+        """reviewerids that reviewed both apps."""
+        return np.intersect1d(self.reviewers_of(appid), self.reviewers_of(other_appid), assume_unique=True)
+
+    def co_review_counts(self, appid, top=None):
+        """
+        For every other app, how many reviewers of `appid` also reviewed it.
+
+        Returns (appids, counts), sorted by count descending, at most `top` entries.
+        """
+        appids = get_rows(*self.csr["reviewer_apps"], self.reviewers_of(appid))
+        appids, counts = np.unique(appids, return_counts=True)
+        other = appids != appid
+        appids, counts = appids[other], counts[other]
+        order = np.argsort(-counts, kind="stable")[:top]
+        return appids[order], counts[order]
+
+    def count_reviewers(self, appid, min_games_owned=None):
+        """Number of reviewers of `appid`, only those owning at least `min_games_owned` games if given."""
+        reviewerids = self.reviewers_of(appid)
+        if min_games_owned is None:
+            return len(reviewerids)
+        return int(np.count_nonzero(self.num_games_owned[reviewerids] >= min_games_owned))
+
+
+def load_csr(directory, name, meta):
+    indptr = np.load(os.path.join(directory, f"{name}.indptr.npy"), mmap_mode="r")
+    if meta["pairs"] == 0:
+        indices = np.empty(0, dtype=np.int32)  # empty files can't be mapped
+    else:
+        indices = np.memmap(os.path.join(directory, f"{name}.indices"), dtype=np.int32, mode="r", shape=(meta["pairs"],))
+    return indptr, indices
+
+
+def get_row(indptr, indices, row):
+    if not 0 <= row < len(indptr) - 1:
+        return np.empty(0, dtype=np.int32)
+    return indices[indptr[row]:indptr[row + 1]]
+
+
+def get_rows(indptr, indices, rows):
+    """Concatenated neighbours of all `rows`, gathered without a Python loop."""
+    rows = np.asarray(rows)
+    rows = rows[(rows >= 0) & (rows < len(indptr) - 1)]
+    starts = np.asarray(indptr[rows])
+    lengths = np.asarray(indptr[rows + 1]) - starts
+    offsets = np.cumsum(lengths) - lengths
+    positions = np.arange(lengths.sum()) - np.repeat(offsets, lengths) + np.repeat(starts, lengths)
+    return indices[positions]
@@ -0,0 +1,263 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from src import db_utility, paths
+
+
+# Stages as DAG: a stage depends on every stage that outputs one of its inputs.
+# Inputs/outputs are files, directories or "db:<name>" (a data_versions entry or the producing stage's last run).
+# Stages without inputs (the app and tag list downloads) only run if their outputs are missing or they are forced,
+# the other downloads also rerun when their inputs change.
+# Optional stages only run if requested explicitly.
+STAGES = {
+    "01_download_app_list": {
+        "module": "src.01_download_data.01_download_app_list",
+        "inputs": [],
+        "outputs": [paths.APP_LIST_PATH],
+    },
+    "02_download_tag_list": {
+        "module": "src.01_download_data.02_download_tag_list",
+        "inputs": [],
+        "outputs": [paths.TAG_LIST_PATH],
+    },
+    "03_download_storebrowse_items": {
+        "module": "src.01_download_data.03_download_storebrowse_items",
+        "inputs": [paths.APP_LIST_PATH],
+        "outputs": [paths.STOREBROWSE_ITEMS_DIRECTORY],
+    },
+    "02_write_tags": {
+        "module": "src.02_write_db.02_write_tags",
+        "inputs": [paths.TAGS_FILE],
+        "outputs": ["db:tags"],
+    },
+    "01_write_apps": {
+        "module": "src.02_write_db.01_write_apps",
+        "inputs": [paths.STOREBROWSE_ITEMS_DIRECTORY, "db:tags"],
+        "outputs": ["db:apps", "db:apps_materialized_view"],
+    },
+    "04_download_appreviews": {
+        "module": "src.01_download_data.04_download_appreviews",
+        "inputs": [paths.APP_LIST_PATH, "db:apps"],
+        "outputs": [paths.REVIEWS_DIRECTORY],
+    },
+    "03_write_reviews": {
+        "module": "src.02_write_db.03_write_reviews",
+        "inputs": [paths.REVIEWS_DIRECTORY],
+        "outputs": ["db:reviews"],
+    },
+    "04_write_app_shared_reviewers": {
+        "module": "src.02_write_db.04_write_app_shared_reviewers",
+        "inputs": ["db:reviews"],
+        "outputs": ["db:app_shared_reviewers"],
+    },
+    "05_write_review_search_index": {
+        "module": "src.02_write_db.05_write_review_search_index",
+        "inputs": ["db:reviews"],
+        "outputs": ["db:review_search_index"],
+    },
+    "08_write_tag_sketches": {
+        "module": "src.02_write_db.08_write_tag_sketches",
+        "inputs": ["db:apps_materialized_view"],
+        "outputs": ["db:tag_sketches"],
+    },
+    "10_write_reviewer_index": {
+        "module": "src.02_write_db.10_write_reviewer_index",
+        "inputs": ["db:reviews"],
+        "outputs": [paths.REVIEWER_INDEX_DIRECTORY],
+    },
+    "07_write_parquet": {
+        "module": "src.02_write_db.07_write_parquet",
+        "inputs": [paths.STOREBROWSE_ITEMS_DIRECTORY, paths.TAGS_FILE, paths.REVIEWS_DIRECTORY],
+        "outputs": [paths.PARQUET_DIRECTORY],
+        "optional": True,
+    },
+    "render_figures": {
+        "module": "src.03_exploration.render_figures",
+        "inputs": ["db:apps", "db:tags", "db:reviews", "db:tag_sketches"],
+        "outputs": [paths.EXPLORATION_OUTPUT_DIR],
+    },
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline stages that are out of date, independent stages in parallel.")
+    parser.add_argument("stages", nargs="*", help="target stages (with their dependencies), default: all non-optional stages")
+    parser.add_argument("--force", nargs="*", help="run these stages even if up to date (no names: all targets)")
+    parser.add_argument("--workers", type=int, default=4, help="max. stages running at the same time")
+    parser.add_argument("--dry-run", action="store_true", help="only print which stages would run")
+    args = parser.parse_args()
+
+    for name in args.stages + (args.force or []):
+        if name not in STAGES:
+            parser.error(f"Unknown stage {name}. Stages: {', '.join(STAGES)}")
+
+    targets = args.stages or default_targets()
+    if args.force is None:
+        force = set()
+    elif not args.force:
+        force = collect_stages(targets)
+    else:
+        force = set(args.force)
+
+    success = run_pipeline(targets, force, args.workers, args.dry_run)
+    sys.exit(0 if success else 1)
+
+
+def default_targets():
+    return [name for name, stage in STAGES.items() if not stage.get("optional")]
+
+
+def get_dependencies(name):
+    inputs = set(STAGES[name]["inputs"])
+    return {other for other, stage in STAGES.items() if other != name and inputs & set(stage["outputs"])}
+
+
+def collect_stages(targets):
+    """The targets and everything they depend on."""
+    selected = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(get_dependencies(name))
+    return selected
+
+
+def run_pipeline(targets, force=(), workers=4, dry_run=False):
+    selected = collect_stages(targets)
+    dependencies = {name: get_dependencies(name) & selected for name in selected}
+    state = load_state()
+
+    done, failed, running = set(), set(), {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while len(done) + len(failed) < len(selected):
+            blocked = {name for name in selected - done - failed - set(running) if dependencies[name] & failed}
+            failed |= blocked
+            for name in blocked:
+                print(f"  [blocked] {name}")
+
+            ready = [
+                name for name in selected - done - failed - set(running)
+                if dependencies[name] <= done
+            ]
+            for name in sorted(ready):
+                fingerprint = get_input_fingerprint(name, state)
+                if name not in force and is_up_to_date(name, fingerprint, state):
+                    print(f"  [skip] {name} (inputs unchanged)")
+                    done.add(name)
+                    continue
+                if dry_run:
+                    print(f"  [would run] {name}")
+                    done.add(name)
+                    continue
+                print(f"  [start] {name}")
+                running[name] = (executor.submit(run_stage, name), fingerprint)
+
+            if not running:
+                if not ready:
+                    raise ValueError(f"Stages can't be scheduled, check for cycles: {sorted(selected - done - failed)}")
+                continue
+
+            finished, _ = wait([future for future, _ in running.values()], return_when=FIRST_COMPLETED)
+            for name, (future, fingerprint) in list(running.items()):
+                if future not in finished:
+                    continue
+                del running[name]
+                returncode, duration = future.result()
+                if returncode != 0:
+                    print(f"  [fail] {name} (exit code {returncode}, {duration:.1f} s)")
+                    failed.add(name)
+                    continue
+                print(f"  [done] {name} ({duration:.1f} s)")
+                done.add(name)
+                state[name] = {
+                    "fingerprint": fingerprint,
+                    "completed_at": datetime.now().isoformat(timespec="seconds"),
+                }
+                save_state(state)
+
+    if failed:
+        print(f"Failed or blocked stages: {', '.join(sorted(failed))}.")
+    return not failed
+
+
+def run_stage(name):
+    start = time.perf_counter()
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    result = subprocess.run([sys.executable, "-m", STAGES[name]["module"]], env=env)
+    return result.returncode, time.perf_counter() - start
+
+
+def is_up_to_date(name, fingerprint, state):
+    stage = STAGES[name]
+    outputs_exist = all(output.startswith("db:") or os.path.exists(output) for output in stage["outputs"])
+    if not outputs_exist:
+        return False
+    if not stage["inputs"]:
+        return True
+    return state.get(name, {}).get("fingerprint") == fingerprint
+
+
+def get_input_fingerprint(name, state):
+    """Hash over the current version of every input of a stage."""
+    versions = read_data_versions()
+    hasher = hashlib.sha256()
+    for resource in STAGES[name]["inputs"]:
+        hasher.update(resource.encode())
+        if resource.startswith("db:"):
+            table = resource[3:]
+            producers = [other for other, stage in STAGES.items() if resource in stage["outputs"]]
+            version = versions.get(table, [state.get(p, {}).get("completed_at") for p in producers])
+            hasher.update(json.dumps(version).encode())
+        else:
+            hasher.update(get_path_version(resource).encode())
+    return hasher.hexdigest()
+
+
+def get_path_version(path):
+    """Size and mtime of a file, or of every file in a directory."""
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+    if not os.path.isdir(path):
+        return "missing"
+    hasher = hashlib.sha256()
+    with os.scandir(path) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.is_file():
+                stat = entry.stat()
+                hasher.update(f"{entry.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return hasher.hexdigest()
+
+
+def read_data_versions():
+    try:
+        with db_utility.connect_to_db() as conn:
+            return db_utility.get_data_versions(conn)
+    except Exception:
+        return {}
+
+
+def load_state():
+    if not os.path.exists(paths.PIPELINE_STATE_PATH):
+        return {}
+    with open(paths.PIPELINE_STATE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(paths.PIPELINE_STATE_PATH), exist_ok=True)
+    with open(paths.PIPELINE_STATE_PATH, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()